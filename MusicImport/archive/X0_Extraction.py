@@ -5,10 +5,14 @@ import json
 import logging
 import subprocess
 import argparse
-import uuid
 import random
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -19,7 +23,7 @@ logging.basicConfig(
 def check_ffmpeg():
     """Check if ffmpeg is installed and in PATH."""
     try:
-        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
         logging.info("ffmpeg found.")
         return True
     except (subprocess.CalledProcessError, FileNotFoundError):
@@ -28,18 +32,19 @@ def check_ffmpeg():
 
 def generate_random_id(length=50):
     """Generate a pseudo-random ID."""
-    uid = uuid.uuid4().hex
-    while len(uid) < length:
-        uid += uuid.uuid4().hex
-    return uid[:length]
+    return os.urandom((length + 1) // 2).hex()[:length]
 
 def find_m4p_files(base_path):
     """Recursively find all .m4p files under the given base directory."""
     files = []
-    for root, dirs, filenames in os.walk(base_path):
-        for fname in filenames:
-            if fname.lower().endswith('.m4p'):
-                files.append(Path(root) / fname)
+    stack = [base_path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith('.m4p'):
+                    files.append(Path(entry.path))
     return files
 
 def extract_metadata(m4p_path, base_path):
@@ -71,7 +76,7 @@ def play_m4p_file(m4p_path):
     try:
         # Spawn afplay as a background process
         # If DRM-protected, this may fail.
-        player_proc = subprocess.Popen(["afplay", str(m4p_path)], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        player_proc = subprocess.Popen(["afplay", str(m4p_path)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         return player_proc
     except Exception as e:
         logging.error(f"Failed to play {m4p_path} with afplay: {e}")
@@ -94,7 +99,7 @@ def record_audio(output_wav_path, duration=None):
 
     try:
         # ffmpeg will run until duration ends or stopped
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
         logging.info(f"Recording completed: {output_wav_path}")
         return True
     except subprocess.CalledProcessError as e:
@@ -110,7 +115,7 @@ def validate_wav_file(file_path):
         return False
     try:
         cmd = ["ffprobe", "-i", str(file_path), "-show_streams", "-select_streams", "a", "-loglevel", "error"]
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         return True
     except subprocess.CalledProcessError:
         logging.error(f"File {file_path} does not contain valid audio data.")
@@ -121,6 +126,8 @@ def load_json_list(json_path):
     if not json_path.exists():
         return []
     try:
+        if orjson is not None:
+            return orjson.loads(json_path.read_bytes())
         with json_path.open('r', encoding='utf-8') as f:
             return json.load(f)
     except json.JSONDecodeError:
@@ -130,13 +137,43 @@ def load_json_list(json_path):
 def save_json_list(json_path, data):
     """Save a list of JSON objects to file."""
     try:
-        with json_path.open('w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        if orjson is not None:
+            json_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with json_path.open('w', encoding='utf-8') as f:
+                f.write(json.dumps(data, indent=2))
         return True
     except Exception as e:
         logging.error(f"Failed to write JSON file: {e}")
         return False
 
+def load_json_lines(jsonl_path):
+    """Load entries from a JSON-Lines file or return an empty list if file doesn't exist."""
+    if not jsonl_path.exists():
+        return []
+    entries = []
+    with jsonl_path.open('r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                logging.warning(f"Skipping corrupted line in {jsonl_path}.")
+    return entries
+
+def append_json_line(jsonl_fh, entry):
+    """Append a single JSON object as one durable line to an open JSON-Lines file."""
+    try:
+        jsonl_fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        jsonl_fh.flush()
+        os.fsync(jsonl_fh.fileno())
+        return True
+    except Exception as e:
+        logging.error(f"Failed to append JSON-Lines file: {e}")
+        return False
+
 def main():
     parser = argparse.ArgumentParser(description="Traverse M4P files, extract metadata, record via BlackHole, and append JSON.")
     parser.add_argument("--input", required=True, help="Path to the input directory containing .m4p files.")
@@ -149,6 +186,7 @@ def main():
     input_dir = Path(args.input).expanduser().resolve()
     output_dir = Path(args.output).expanduser().resolve()
     json_file = output_dir / args.json_output
+    jsonl_file = json_file.with_suffix('.jsonl')
 
     if not input_dir.exists():
         logging.error(f"Input directory does not exist: {input_dir}")
@@ -172,50 +210,63 @@ def main():
     # Parse recording duration
     record_duration = None if args.record_duration == "full" else int(args.record_duration)
 
-    # Load existing JSON data
+    # Load existing JSON data, plus entries a previous interrupted run only wrote to the sidecar
     songs_data = load_json_list(json_file)
+    known_ids = {entry.get("songId") for entry in songs_data}
+    recovered = [entry for entry in load_json_lines(jsonl_file) if entry.get("songId") not in known_ids]
+    if recovered:
+        logging.info(f"Recovered {len(recovered)} entries from {jsonl_file}")
+        songs_data.extend(recovered)
 
-    for i, m4p in enumerate(m4p_files, start=1):
-        logging.info(f"Processing file {i}/{len(m4p_files)}: {m4p}")
-        try:
-            metadata = extract_metadata(m4p, base_path=input_dir)
-            song_id = generate_random_id()
-            wav_filename = f"{song_id}.wav"
-            wav_path = output_dir / wav_filename
-
-            # Start playing the M4P file
-            player_proc = play_m4p_file(m4p)
-            if player_proc is None:
-                logging.error(f"Could not start playback for {m4p}")
-                continue
+    # Keep the JSON-Lines sidecar open for the whole run
+    with jsonl_file.open('a', encoding='utf-8') as jsonl_fh:
+        for i, m4p in enumerate(m4p_files, start=1):
+            logging.info(f"Processing file {i}/{len(m4p_files)}: {m4p}")
+            try:
+                metadata = extract_metadata(m4p, base_path=input_dir)
+                song_id = generate_random_id()
+                wav_filename = f"{song_id}.wav"
+                wav_path = output_dir / wav_filename
 
-            # Record the audio
-            recorded = record_audio(wav_path, duration=record_duration)
+                # Start playing the M4P file
+                player_proc = play_m4p_file(m4p)
+                if player_proc is None:
+                    logging.error(f"Could not start playback for {m4p}")
+                    continue
 
-            # After recording is done, kill the player_proc if still running
-            if player_proc.poll() is None:
-                player_proc.kill()
+                # Record the audio
+                recorded = record_audio(wav_path, duration=record_duration)
 
-            if not recorded or not validate_wav_file(wav_path):
-                logging.error(f"Failed to process or validate track: {m4p}")
-                continue
+                # After recording is done, kill the player_proc if still running
+                if player_proc.poll() is None:
+                    player_proc.kill()
+
+                if not recorded or not validate_wav_file(wav_path):
+                    logging.error(f"Failed to process or validate track: {m4p}")
+                    continue
 
-            new_entry = {
-                "songId": song_id,
-                "name": metadata["song"],
-                "album": metadata["album"],
-                "artist": metadata["artist"],
-                "fullPath": str(m4p.resolve())
-            }
-            songs_data.append(new_entry)
-
-            # Save updated JSON
-            if not save_json_list(json_file, songs_data):
-                logging.error("Failed to update JSON with new song entry.")
-
-        except Exception as e:
-            logging.error(f"Error processing {m4p}: {e}")
-        logging.info(f"Finished processing file {i}/{len(m4p_files)}: {m4p}")
+                new_entry = {
+                    "songId": song_id,
+                    "name": metadata["song"],
+                    "album": metadata["album"],
+                    "artist": metadata["artist"],
+                    "fullPath": str(m4p)
+                }
+                songs_data.append(new_entry)
+
+                # Append to the JSON-Lines sidecar so progress survives a crash
+                if not append_json_line(jsonl_fh, new_entry):
+                    logging.error("Failed to append new song entry to JSON-Lines sidecar.")
+
+            except Exception as e:
+                logging.error(f"Error processing {m4p}: {e}")
+            logging.info(f"Finished processing file {i}/{len(m4p_files)}: {m4p}")
+
+    # Save the full JSON array once; the sidecar is only needed until then
+    if save_json_list(json_file, songs_data):
+        jsonl_file.unlink(missing_ok=True)
+    else:
+        logging.error(f"Failed to write JSON file with song entries. Entries remain in {jsonl_file}")
 
     logging.info(f"Processed {len(songs_data)} songs total. JSON file updated: {json_file}")
 
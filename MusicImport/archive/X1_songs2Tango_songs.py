@@ -28,8 +28,16 @@ import json
 import logging
 import unicodedata
 import re
+import hashlib
+import shelve
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -40,11 +48,36 @@ logging.basicConfig(
     ]
 )
 
+class _MarkTable(dict):
+    """str.translate table that deletes nonspacing marks (category Mn), filled lazily per codepoint."""
+
+    def __missing__(self, codepoint):
+        value = None if unicodedata.category(chr(codepoint)) == 'Mn' else codepoint
+        self[codepoint] = value
+        return value
+
+_MARK_TABLE = _MarkTable()
+
+# Leading track number followed by whitespace, e.g. "01 Pablo"
+_LEADING_NUM_RE = re.compile(r'^\d+\s+')
+
+# Song fields cleaned by clean_song_entry
+CLEAN_FIELDS = ('name', 'artist', 'album')
+
 # Transformations dictionary for replacing specific words
 TRANSFORMATIONS = {
     "Osvalo": "Osvaldo"
 }
 
+# Version of the clean_field / remove_diacritics semantics stored in the clean cache;
+# bump it whenever either changes what a value cleans to
+_CLEAN_CACHE_VERSION = 2
+
+# Single alternation over all TRANSFORMATIONS keys (longest first) for one-pass replacement
+_TRANSFORMATIONS_RE = re.compile(
+    '|'.join(re.escape(old_word) for old_word in sorted(TRANSFORMATIONS, key=len, reverse=True))
+)
+
 def apply_transformations(text):
     """
     Apply word transformations based on the TRANSFORMATIONS dictionary.
@@ -59,9 +92,16 @@ def apply_transformations(text):
         logging.warning(f"Expected string for transformation, got {type(text)}. Skipping.")
         return text
 
-    for old_word, new_word in TRANSFORMATIONS.items():
-        text = text.replace(old_word, new_word)
-    return text
+    if not TRANSFORMATIONS:
+        return text
+    return _TRANSFORMATIONS_RE.sub(lambda match: TRANSFORMATIONS[match.group(0)], text)
+
+@lru_cache(maxsize=100_000)
+def _remove_diacritics_str(text):
+    """Memoized diacritic strip for str input."""
+    if text.isascii():
+        return text
+    return unicodedata.normalize('NFD', text).translate(_MARK_TABLE)
 
 def remove_diacritics(text):
     """
@@ -76,11 +116,7 @@ def remove_diacritics(text):
     if not isinstance(text, str):
         logging.warning(f"Expected string for diacritics removal, got {type(text)}. Skipping.")
         return text
-    normalized = unicodedata.normalize('NFD', text)
-    without_diacritics = ''.join(
-        char for char in normalized if unicodedata.category(char) != 'Mn'
-    )
-    return without_diacritics
+    return _remove_diacritics_str(text)
 
 def remove_leading_numbers(text):
     """
@@ -92,8 +128,7 @@ def remove_leading_numbers(text):
     Returns:
         str: The string without leading numbers and spaces.
     """
-    cleaned_text = re.sub(r'^\d+\s+', '', text)
-    return cleaned_text
+    return _LEADING_NUM_RE.sub('', text)
 
 def load_json_file(filepath):
     """
@@ -110,8 +145,11 @@ def load_json_file(filepath):
         json.JSONDecodeError: If the file contains invalid JSON.
     """
     try:
-        with filepath.open('r', encoding='utf-8') as f:
-            data = json.load(f)
+        if orjson is not None:
+            data = orjson.loads(filepath.read_bytes())
+        else:
+            with filepath.open('r', encoding='utf-8') as f:
+                data = json.load(f)
         logging.info(f"Loaded {len(data)} records from '{filepath.name}'.")
         return data
     except FileNotFoundError:
@@ -133,37 +171,120 @@ def save_json_file(data, filepath):
         IOError: If writing to the file fails.
     """
     try:
-        with filepath.open('w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            filepath.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with filepath.open('w', encoding='utf-8') as f:
+                f.write(json.dumps(data, ensure_ascii=False, indent=2))
         logging.info(f"Saved {len(data)} records to '{filepath.name}'.")
     except IOError as e:
         logging.error(f"Failed to write to '{filepath.name}': {e}")
         raise
 
-def clean_song_entry(song):
+def clean_field(field, text):
+    """
+    Clean a single song field value.
+
+    Parameters:
+        field (str): The field name ('name', 'artist' or 'album').
+        text (str): The original field value.
+
+    Returns:
+        str: The cleaned value.
+    """
+    cleaned = remove_diacritics(text)
+    cleaned = apply_transformations(cleaned)
+    if field == 'name':
+        cleaned = remove_leading_numbers(cleaned)
+    return cleaned
+
+def open_clean_cache(cache_file):
+    """
+    Open the persistent cache of cleaned field values.
+
+    The cache is cleared when TRANSFORMATIONS or _CLEAN_CACHE_VERSION differs
+    from the table and version the cached values were produced with.
+
+    Parameters:
+        cache_file (Path): Base path of the shelve database.
+
+    Returns:
+        shelve.Shelf: The opened cache.
+    """
+    cache = shelve.open(str(cache_file))
+    if (cache.get('__version__') != _CLEAN_CACHE_VERSION
+            or cache.get('__transformations__') != TRANSFORMATIONS):
+        cache.clear()
+        cache['__version__'] = _CLEAN_CACHE_VERSION
+        cache['__transformations__'] = dict(TRANSFORMATIONS)
+    return cache
+
+def build_cleaned_values(songs, cache=None):
+    """
+    Clean every distinct field value across all songs in one batch.
+
+    Artist and album values repeat across thousands of songs, so each distinct
+    string is cleaned (or fetched from the persistent cache) exactly once.
+
+    Parameters:
+        songs (list): List of song dictionaries.
+        cache (shelve.Shelf, optional): Persistent cache of cleaned values keyed
+            by field and original text.
+
+    Returns:
+        dict: Mapping of field name to a {original: cleaned} dictionary.
+    """
+    cleaned_values = {}
+    for field in CLEAN_FIELDS:
+        # Malformed records are left out here; clean_song_entry reports and skips them per song
+        distinct = set()
+        for song in songs:
+            if isinstance(song, dict) and isinstance(song.get(field, ""), str):
+                distinct.add(song.get(field, ""))
+        field_values = {}
+        for original in distinct:
+            key = f"{field}:{original}"
+            cleaned = cache.get(key) if cache is not None else None
+            if cleaned is None:
+                try:
+                    cleaned = clean_field(field, original)
+                except Exception as e:
+                    # Not precomputed, so the songs holding this value fail and are skipped individually
+                    logging.error(f"Error cleaning {field} value '{original}': {e}")
+                    continue
+                if cache is not None:
+                    cache[key] = cleaned
+            field_values[original] = cleaned
+        cleaned_values[field] = field_values
+    return cleaned_values
+
+def clean_song_entry(song, cleaned_values=None):
     """
     Clean a single song entry by applying transformations, removing diacritics,
     and leading numbers from 'name'.
 
+    The entry is modified in place to avoid copying every song dictionary.
+
     Parameters:
-        song (dict): The original song dictionary.
+        song (dict): The song dictionary to clean.
+        cleaned_values (dict, optional): Precomputed values from
+            `build_cleaned_values`; values not found there are cleaned directly.
 
     Returns:
-        dict: The cleaned song dictionary.
+        dict: The same song dictionary, cleaned.
     """
-    cleaned_song = song.copy()
-    for field in ['name', 'artist', 'album']:
+    for field in CLEAN_FIELDS:
         original = song.get(field, "")
-        cleaned = remove_diacritics(original)
-        cleaned = apply_transformations(cleaned)
-        if field == 'name':
-            cleaned = remove_leading_numbers(cleaned)
-        cleaned_song[field] = cleaned
+        if cleaned_values is not None and isinstance(original, str) and original in cleaned_values[field]:
+            cleaned = cleaned_values[field][original]
+        else:
+            cleaned = clean_field(field, original)
+        song[field] = cleaned
         if original != cleaned:
-            logging.debug(f"Cleaned field '{field}': '{original}' -> '{cleaned}'")
-    return cleaned_song
+            logging.debug("Cleaned field '%s': '%s' -> '%s'", field, original, cleaned)
+    return song
 
-def process_songs(input_file, output_file):
+def process_songs(input_file, output_file, cache_file=None):
     """
     Process 'songs.json' to apply transformations, remove diacritics,
     leading numbers, and save as 'tango_songs.json'.
@@ -171,6 +292,7 @@ def process_songs(input_file, output_file):
     Parameters:
         input_file (Path): Path to 'songs.json'.
         output_file (Path): Path to 'tango_songs.json'.
+        cache_file (Path, optional): Base path of the persistent clean cache.
 
     Returns:
         list: List of cleaned song dictionaries.
@@ -181,10 +303,17 @@ def process_songs(input_file, output_file):
         logging.critical(f"Cannot proceed without valid '{input_file.name}'. Exiting.")
         sys.exit(1)
 
+    cache = open_clean_cache(cache_file) if cache_file is not None else None
+    try:
+        cleaned_values = build_cleaned_values(songs, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
     cleaned_songs = []
     for idx, song in enumerate(songs, start=1):
         try:
-            cleaned_song = clean_song_entry(song)
+            cleaned_song = clean_song_entry(song, cleaned_values)
             cleaned_songs.append(cleaned_song)
         except Exception as e:
             logging.error(f"Error processing song at index {idx}: {e}")
@@ -222,16 +351,39 @@ def extract_unique_artists(songs):
     logging.info(f"Extracted {len(unique_artists)} unique artists.")
     return unique_artists
 
+def artists_signature(artists):
+    """
+    Compute a stable signature of the artist names.
+
+    Parameters:
+        artists (list): Sorted list of artist dictionaries.
+
+    Returns:
+        str: SHA-256 hex digest of the newline-joined artist names.
+    """
+    names = "\n".join(artist["name"] for artist in artists)
+    return hashlib.sha256(names.encode('utf-8')).hexdigest()
+
 def save_artists(artists, filepath):
     """
     Save the list of artists to 'artists.json'.
 
+    A '.sig' file next to the output stores the signature of the last saved
+    artist list; when it matches and the output exists, the rewrite is skipped.
+
     Parameters:
         artists (list): List of artist dictionaries.
         filepath (Path): Path to 'artists.json'.
     """
+    sig_file = filepath.with_suffix('.sig')
+    signature = artists_signature(artists)
+    if filepath.exists() and sig_file.exists() and sig_file.read_text(encoding='utf-8').strip() == signature:
+        logging.info(f"No change in artists; keeping existing '{filepath.name}'.")
+        return
+
     try:
         save_json_file(artists, filepath)
+        sig_file.write_text(signature, encoding='utf-8')
         logging.info(f"Saved artists data to '{filepath.name}'.")
     except Exception as e:
         logging.critical(f"Failed to save '{filepath.name}'. Exiting.")
@@ -245,11 +397,12 @@ def main():
     input_file = current_dir / "/Users/tobybalsley/Music/RecordedWAVs/songs.json"
     tango_songs_file = current_dir / "tango_songs.json"
     artists_file = current_dir / "ArtistsRaw.json"
+    clean_cache_file = current_dir / "tango_songs_clean_cache"
 
     logging.info("Starting processing of song data.")
 
     # Step 1: Process 'songs.json' to 'tango_songs.json'
-    cleaned_songs = process_songs(input_file, tango_songs_file)
+    cleaned_songs = process_songs(input_file, tango_songs_file, clean_cache_file)
 
     # Step 2: Extract unique artists and save to 'artists.json'
     unique_artists = extract_unique_artists(cleaned_songs)
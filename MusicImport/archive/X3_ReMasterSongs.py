@@ -24,6 +24,18 @@ import json
 import logging
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional multi-pattern matcher for the MasterArtist substring scan
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -49,8 +61,11 @@ def load_json_file(filepath):
         json.JSONDecodeError: If the file contains invalid JSON.
     """
     try:
-        with filepath.open('r', encoding='utf-8') as f:
-            data = json.load(f)
+        if orjson is not None:
+            data = orjson.loads(filepath.read_bytes())
+        else:
+            with filepath.open('r', encoding='utf-8') as f:
+                data = json.load(f)
         logging.info(f"Loaded {len(data)} records from '{filepath.name}'.")
         return data
     except FileNotFoundError:
@@ -72,13 +87,41 @@ def save_json_file(data, filepath):
         IOError: If writing to the file fails.
     """
     try:
-        with filepath.open('w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            filepath.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with filepath.open('w', encoding='utf-8') as f:
+                f.write(json.dumps(data, ensure_ascii=False, indent=2))
         logging.info(f"Saved {len(data)} records to '{filepath.name}'.")
     except IOError as e:
         logging.error(f"Failed to write to '{filepath.name}': {e}")
         raise
 
+def build_master_artist_automaton(master_artists):
+    """
+    Build an Aho-Corasick automaton over all master artist names.
+
+    Each word maps to `(priority, artist)` where priority is the position in
+    `master_artists`, so the lowest priority hit reproduces the first-match
+    order of a linear scan.
+
+    Parameters:
+        master_artists (list): Ordered list of master artist names.
+
+    Returns:
+        ahocorasick.Automaton or None: The automaton, or None when pyahocorasick
+        is not installed or there are no names to match.
+    """
+    if not AHOCORASICK_AVAILABLE or not master_artists:
+        return None
+
+    automaton = ahocorasick.Automaton()
+    for priority, master_artist in enumerate(master_artists):
+        if master_artist not in automaton:
+            automaton.add_word(master_artist, (priority, master_artist))
+    automaton.make_automaton()
+    return automaton
+
 def add_master_artist_to_songs(tango_songs, artist_master):
     """
     Add the `MasterArtist` attribute to each song in `tango_songs` based on `ArtistMaster.json`.
@@ -91,13 +134,24 @@ def add_master_artist_to_songs(tango_songs, artist_master):
         list: Updated list of songs with `MasterArtist` attribute added.
     """
     master_artists = [artist["artist"] for artist in artist_master]
+    automaton = build_master_artist_automaton(master_artists)
+    # Song artist -> resolved MasterArtist; artist strings repeat across many songs
+    resolved_artists = {}
 
     for song in tango_songs:
         song_artist = song.get("artist", "")
-        # Check if any `MasterArtist` appears in the song's artist
-        master_artist = next((ma for ma in master_artists if ma in song_artist), "Unknown")
+        master_artist = resolved_artists.get(song_artist)
+        if master_artist is None:
+            # Check if any `MasterArtist` appears in the song's artist
+            if automaton is not None:
+                hits = [value for _, value in automaton.iter(song_artist)]
+                master_artist = min(hits)[1] if hits else "Unknown"
+            else:
+                master_artist = next((ma for ma in master_artists if ma in song_artist), "Unknown")
+            resolved_artists[song_artist] = master_artist
         song["MasterArtist"] = master_artist
-        logging.debug(f"Processed song '{song.get('name')}', MasterArtist: {master_artist}")
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("Processed song '%s', MasterArtist: %s", song.get('name'), master_artist)
 
     return tango_songs
 
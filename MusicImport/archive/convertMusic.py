@@ -5,9 +5,13 @@ import json
 import logging
 import subprocess
 import argparse
-import uuid
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -15,25 +19,49 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
+# Result of the ffmpeg availability check, filled in on first call
+_FFMPEG_AVAILABLE = None
+
 def check_ffmpeg():
-    """Check if ffmpeg is installed and in PATH."""
+    """Check if ffmpeg is installed and in PATH (only probed once per process)."""
+    global _FFMPEG_AVAILABLE
+    if _FFMPEG_AVAILABLE is not None:
+        return _FFMPEG_AVAILABLE
     try:
-        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
         logging.info("ffmpeg found.")
-        return True
+        _FFMPEG_AVAILABLE = True
     except (subprocess.CalledProcessError, FileNotFoundError):
         logging.error("ffmpeg not found. Please install ffmpeg and ensure it's in your PATH.")
-        return False
+        _FFMPEG_AVAILABLE = False
+    return _FFMPEG_AVAILABLE
 
 def generate_random_id(length=50):
     """
     Generate a pseudo-random ID.
-    Using UUID and concatenation to achieve desired length.
+    Hex-encodes os.urandom bytes in one call and trims to the desired length.
+    """
+    return os.urandom((length + 1) // 2).hex()[:length]
+
+def iter_m4p_files(base_path):
     """
-    uid = uuid.uuid4().hex
-    while len(uid) < length:
-        uid += uuid.uuid4().hex
-    return uid[:length]
+    Recursively yield .m4p files under the given base directory.
+
+    Uses os.scandir so directory entries carry their type and no extra
+    stat calls are needed to tell files from directories.
+
+    Parameters:
+        base_path (Path): The base directory to search.
+
+    Yields:
+        Path: Path to each .m4p file.
+    """
+    with os.scandir(base_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_m4p_files(entry.path)
+            elif entry.name.lower().endswith('.m4p'):
+                yield Path(entry.path)
 
 def find_m4p_files(base_path):
     """
@@ -45,14 +73,26 @@ def find_m4p_files(base_path):
     Returns:
         list[Path]: List of paths to .m4p files.
     """
-    files = []
-    for root, dirs, filenames in os.walk(base_path):
-        for fname in filenames:
-            if fname.lower().endswith('.m4p'):
-                files.append(Path(root) / fname)
-    return files
+    return list(iter_m4p_files(base_path))
+
+def find_pivot_root(input_dir, pivot):
+    """
+    Locate the pivot directory once for a whole input tree.
+
+    Parameters:
+        input_dir (Path): The resolved input directory.
+        pivot (str): The directory name to pivot extraction from.
+
+    Returns:
+        Path or None: The pivot directory if input_dir is the pivot or lies
+        below it, otherwise None (the pivot must then be searched per file).
+    """
+    parts = input_dir.parts
+    if pivot not in parts:
+        return None
+    return Path(*parts[:parts.index(pivot) + 1])
 
-def extract_metadata(m4p_path, pivot='Pass 1'):
+def extract_metadata(m4p_path, pivot='Pass 1', pivot_root=None):
     """
     Extract artist, album, and song metadata from the .m4p file path.
     We expect a structure like:
@@ -61,6 +101,8 @@ def extract_metadata(m4p_path, pivot='Pass 1'):
     Parameters:
         m4p_path (Path): Full path to the .m4p file.
         pivot (str): The directory name to pivot extraction from.
+        pivot_root (Path): Pivot directory from find_pivot_root, if known;
+            skips the per-file search for the pivot component.
     
     Returns:
         dict: {
@@ -69,6 +111,13 @@ def extract_metadata(m4p_path, pivot='Pass 1'):
             'song': str
         }
     """
+    if pivot_root is not None:
+        rel_parts = m4p_path.relative_to(pivot_root).parts
+        if len(rel_parts) < 2:
+            logging.error(f"Path structure not as expected: {m4p_path}")
+            raise ValueError("Not enough directories to extract metadata.")
+        return {'artist': rel_parts[0], 'album': rel_parts[1], 'song': m4p_path.stem}
+
     parts = m4p_path.parts
     try:
         pivot_index = parts.index(pivot)
@@ -113,11 +162,11 @@ def record_audio(output_wav_path, duration=30):
         str(output_wav_path)
     ]
     try:
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
         logging.info(f"Recorded WAV file: {output_wav_path}")
         return True
     except subprocess.CalledProcessError as e:
-        logging.error(f"Failed to record audio: {e}")
+        logging.error(f"Failed to record audio: {e.stderr.decode('utf-8', errors='replace')}")
         return False
 
 def load_json_list(json_path):
@@ -127,6 +176,8 @@ def load_json_list(json_path):
     if not json_path.exists():
         return []
     try:
+        if orjson is not None:
+            return orjson.loads(json_path.read_bytes())
         with json_path.open('r', encoding='utf-8') as f:
             return json.load(f)
     except json.JSONDecodeError:
@@ -141,13 +192,46 @@ def save_json_list(json_path, data):
     Save a list of JSON objects to file.
     """
     try:
-        with json_path.open('w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        if orjson is not None:
+            json_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with json_path.open('w', encoding='utf-8') as f:
+                f.write(json.dumps(data, indent=2))
         return True
     except Exception as e:
         logging.error(f"Failed to write JSON file: {e}")
         return False
 
+def load_json_lines(jsonl_path):
+    """
+    Load entries from a JSON-Lines file or return an empty list if file doesn't exist.
+    """
+    if not jsonl_path.exists():
+        return []
+    entries = []
+    with jsonl_path.open('r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                logging.warning(f"Skipping corrupted line in {jsonl_path}.")
+    return entries
+
+def append_json_line(jsonl_fh, entry):
+    """
+    Append a single JSON object as one line to an open JSON-Lines file.
+    """
+    try:
+        jsonl_fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        jsonl_fh.flush()
+        return True
+    except Exception as e:
+        logging.error(f"Failed to append JSON-Lines file: {e}")
+        return False
+
 def main():
     parser = argparse.ArgumentParser(description="Traverse M4P files, extract metadata, record via BlackHole, and incrementally append JSON.")
     parser.add_argument("--input", required=True, help="Path to the input directory containing .m4p files.")
@@ -160,6 +244,7 @@ def main():
     input_dir = Path(args.input).expanduser().resolve()
     output_dir = Path(args.output).expanduser().resolve()
     json_file = output_dir / args.json_output
+    jsonl_file = json_file.with_suffix('.jsonl')
 
     if not input_dir.exists():
         logging.error(f"Input directory does not exist: {input_dir}")
@@ -176,48 +261,73 @@ def main():
         sys.exit(1)
     
     m4p_files = find_m4p_files(input_dir)
+    pivot_root = find_pivot_root(input_dir, args.pivot)
     if not m4p_files:
         logging.warning("No .m4p files found in the input directory.")
         sys.exit(0)
 
-    # Load or initialize the JSON data
+    # Load or initialize the JSON data, replaying entries an interrupted run left in the sidecar
     songs_data = load_json_list(json_file)
+    known_ids = {entry.get("songId") for entry in songs_data}
+    recovered = [entry for entry in load_json_lines(jsonl_file) if entry.get("songId") not in known_ids]
+    if recovered:
+        logging.info(f"Recovered {len(recovered)} entries from {jsonl_file}")
+        songs_data.extend(recovered)
 
-    for m4p in m4p_files:
-        try:
-            metadata = extract_metadata(m4p, pivot=args.pivot)
-        except ValueError as ve:
-            logging.error(f"Skipping file due to metadata extraction issue: {m4p} - {ve}")
-            continue
-
-        song_id = generate_random_id()
-        # Create a unique wav filename from the song_id
-        wav_filename = f"{song_id}.wav"
-        wav_path = output_dir / wav_filename
-
-        # Optional: start playing the track here if needed
-        # e.g., subprocess.run(["afplay", str(m4p)], check=True)
-        # Sleep briefly if necessary to ensure playback starts before recording.
-
-        # Record the audio
-        recorded = record_audio(wav_path, duration=args.duration)
-        if not recorded:
-            logging.error(f"Failed to record track for {m4p}")
-            continue
-
-        # Append this song's data to JSON
-        new_entry = {
-            "songId": song_id,
-            "name": metadata["song"],
-            "album": metadata["album"],
-            "artist": metadata["artist"],
-            "fullPath": str(m4p.resolve())
-        }
-        songs_data.append(new_entry)
+    # Files already recorded with the same path, mtime and size are skipped
+    done = {(entry.get("fullPath"), entry.get("mtime"), entry.get("size")) for entry in songs_data}
+
+    try:
+        with jsonl_file.open('a', encoding='utf-8', buffering=1 << 16) as jsonl_fh:
+            for m4p in m4p_files:
+                full_path = str(m4p)  # already absolute: input_dir is resolved once above
+                st = m4p.stat()
+                if (full_path, st.st_mtime, st.st_size) in done:
+                    logging.info(f"Skipping already processed file: {m4p}")
+                    continue
+
+                try:
+                    metadata = extract_metadata(m4p, pivot=args.pivot, pivot_root=pivot_root)
+                except ValueError as ve:
+                    logging.error(f"Skipping file due to metadata extraction issue: {m4p} - {ve}")
+                    continue
+
+                song_id = generate_random_id()
+                # Create a unique wav filename from the song_id
+                wav_filename = f"{song_id}.wav"
+                wav_path = output_dir / wav_filename
+
+                # Optional: start playing the track here if needed
+                # e.g., subprocess.run(["afplay", str(m4p)], check=True)
+                # Sleep briefly if necessary to ensure playback starts before recording.
+
+                # Record the audio
+                recorded = record_audio(wav_path, duration=args.duration)
+                if not recorded:
+                    logging.error(f"Failed to record track for {m4p}")
+                    continue
+
+                # Append this song's data
+                new_entry = {
+                    "songId": song_id,
+                    "name": metadata["song"],
+                    "album": metadata["album"],
+                    "artist": metadata["artist"],
+                    "fullPath": full_path,
+                    "mtime": st.st_mtime,
+                    "size": st.st_size
+                }
+                songs_data.append(new_entry)
 
-        # Save the updated JSON file
-        if not save_json_list(json_file, songs_data):
-            logging.error("Failed to update JSON with new song entry. Continuing anyway.")
+                # Append the entry to the JSON-Lines sidecar instead of rewriting the whole JSON
+                if not append_json_line(jsonl_fh, new_entry):
+                    logging.error("Failed to append new song entry to JSON-Lines sidecar. Continuing anyway.")
+    finally:
+        # Write the consolidated JSON once, also when interrupted
+        if save_json_list(json_file, songs_data):
+            jsonl_file.unlink(missing_ok=True)
+        else:
+            logging.error(f"Failed to write JSON file. Entries remain in {jsonl_file}")
 
     logging.info(f"Processed {len(songs_data)} songs total. JSON file updated: {json_file}")
 
@@ -1,67 +1,121 @@
 import csv
 import json
-import uuid
+import os
 import re
+import unicodedata
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Precompiled patterns used per row
+_COMMA_PATTERNS = [
+    (re.compile(r"\bDi Sarli, Carlos\b"), "Carlos Di Sarli"),
+    (re.compile(r"\bDe Angelis, Alfredo\b"), "Alfredo De Angelis")
+]
+_BRACKETS_RE = re.compile(r'\[.*?\]')
+
+# Genre keywords that mark a row as a tango song, in Style1 priority order
+_GENRE_KW = ('tango', 'vals', 'waltz', 'milonga', 'marcha')
+
+@lru_cache(maxsize=100_000)
 def clean_special_characters(text):
     """Remove diacritics and special characters."""
-    import unicodedata
-    cleaned_text = ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
-    return cleaned_text.strip().lstrip('.')
+    if not text.isascii():
+        _norm, _cat = unicodedata.normalize, unicodedata.category
+        text = ''.join(c for c in _norm('NFD', text) if _cat(c) != 'Mn')
+    return text.strip().lstrip('.')
 
+@lru_cache(maxsize=100_000)
 def clean_commas(text):
     """Swap comma-separated names like 'Last, First' for specific patterns."""
-    patterns = [
-        (r"\bDi Sarli, Carlos\b", "Carlos Di Sarli"),
-        (r"\bDe Angelis, Alfredo\b", "Alfredo De Angelis")
-    ]
-    for pattern, replacement in patterns:
-        text = re.sub(pattern, replacement, text)
+    for pattern, replacement in _COMMA_PATTERNS:
+        text = pattern.sub(replacement, text)
     if ',' in text:
         parts = text.split(',')
         if len(parts) == 2 and len(parts[1].split()) <= 2:
             return f"{parts[1].strip()} {parts[0].strip()}"
     return text
 
+@lru_cache(maxsize=100_000)
 def remove_square_brackets(text):
     """Remove content inside square brackets."""
-    return re.sub(r'\[.*?\]', '', text).strip()
+    return _BRACKETS_RE.sub('', text).strip()
 
-def determine_style1(genre):
-    """Determine Style1 based on genre."""
-    for style in ['tango', 'vals', 'waltz', 'milonga', 'marcha']:
-        if style in genre.lower():
+def is_tango_genre(genre_lower):
+    """Check if a lowercased genre contains any tango genre keyword."""
+    return any(kw in genre_lower for kw in _GENRE_KW)
+
+def determine_style1(genre_lower):
+    """Determine Style1 based on the lowercased genre."""
+    for style in _GENRE_KW:
+        if style in genre_lower:
             return style.capitalize()
     return "Unknown"
 
-def determine_alternative(genre):
-    """Determine if 'Alternative' applies."""
+def determine_alternative(genre_lower):
+    """Determine if 'Alternative' applies to the lowercased genre."""
     alt_keywords = ['alt', 'alt.', 'alternative']
-    if any(kw in genre.lower() for kw in alt_keywords) and 'waltz' not in genre.lower():
+    if any(kw in genre_lower for kw in alt_keywords) and 'waltz' not in genre_lower:
         return "Y"
-    if 'alt waltz' in genre.lower() or 'alternative waltz' in genre.lower():
+    if 'alt waltz' in genre_lower or 'alternative waltz' in genre_lower:
         return "Y"
     return "N"
 
-def determine_candombe(genre):
-    """Determine if 'Candombe' applies."""
-    return "Y" if 'candombe' in genre.lower() else "N"
+def determine_candombe(genre_lower):
+    """Determine if 'Candombe' applies to the lowercased genre."""
+    return "Y" if 'candombe' in genre_lower else "N"
+
+def determine_cancion(genre_lower):
+    """Determine if Cancion applies to the lowercased genre."""
+    return "Y" if 'canción' in genre_lower or 'cancion' in genre_lower else "N"
+
+def dumps_indented(obj):
+    """Serialize obj to a str laid out like json.dumps(..., ensure_ascii=False, indent=2)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+def iter_song_ids(batch_size=4096):
+    """Yield 32-char hex song IDs, reading os.urandom once per batch instead of once per ID."""
+    while True:
+        pool = os.urandom(16 * batch_size)
+        for i in range(0, len(pool), 16):
+            yield pool[i:i + 16].hex()
 
-def determine_cancion(genre):
-    """Determine if Cancion applies."""
-    return "Y" if 'canción' in genre.lower() or 'cancion' in genre.lower() else "N"
+@lru_cache(maxsize=None)
+def classify_genre(genre):
+    """Return (Style1, Alternative, Candombe, Cancion) for a tango genre, or None if it is not one."""
+    genre_lower = genre.lower()
+    if not is_tango_genre(genre_lower):
+        return None
+    return (determine_style1(genre_lower), determine_alternative(genre_lower),
+            determine_candombe(genre_lower), determine_cancion(genre_lower))
 
 def process_csv(input_path, output_path, master_output_path):
-    """Process CSV and create JSON file."""
-    with open(input_path, 'r', encoding='utf-8') as csvfile:
+    """Process CSV and create JSON file, streaming one row at a time."""
+    # Stream into a temp file next to the output; it replaces output_path only once complete,
+    # so a row that fails to parse leaves the previous file intact
+    tmp_path = output_path.with_suffix('.tmp')
+    with open(input_path, 'r', encoding='utf-8') as csvfile, \
+            open(tmp_path, 'w', encoding='utf-8') as jsonfile:
         reader = csv.DictReader(csvfile)
-        filtered_rows = [row for row in reader if any(kw in row['genre'].lower() for kw in ['tango', 'vals', 'waltz', 'milonga', 'marcha'])]
-        
-        result = []
+        song_ids = iter_song_ids()
+
+        record_count = 0
         artist_set = set()  # To keep track of unique artistCleanL2
-        for row in filtered_rows:
-            song_id = uuid.uuid4().hex
+        jsonfile.write('[')
+        for row in reader:
+            # A library has only a handful of distinct genres, so classification is cached per value
+            genre_flags = classify_genre(row['genre'])
+            if genre_flags is None:
+                continue
+            style1, alternative, candombe, cancion = genre_flags
+
+            song_id = next(song_ids)
             dj_id = row['id']  # Add djId from the 'id' field in the CSV
             song_title_original = row['title']
             song_title_clean_l1 = clean_special_characters(song_title_original)
@@ -78,12 +132,11 @@ def process_csv(input_path, output_path, master_output_path):
             year = row['year']
             duration = round(float(row['duration'])) if row['duration'] else None
             bpm = round(float(row['bpm'])) if row['bpm'] else None
-            genre = row['genre']
 
             # Add artistCleanL2 to the set
             artist_set.add(artist_clean_l2)
 
-            result.append({
+            entry = {
                 "songID": song_id,
                 "djId": dj_id,
                 "songTitleOriginal": song_title_original,
@@ -101,25 +154,30 @@ def process_csv(input_path, output_path, master_output_path):
                 "year": year,
                 "duration": duration,
                 "bpm": bpm,
-                "Style1": determine_style1(genre),
-                "Alternative": determine_alternative(genre),
-                "Candombe": determine_candombe(genre),
-                "Cancion": determine_cancion(genre)
-            })
-
-        # Save tangoSongs.json
-        with open(output_path, 'w', encoding='utf-8') as jsonfile:
-            json.dump(result, jsonfile, ensure_ascii=False, indent=2)
-        print(f"Processed {len(result)} records and saved to {output_path}")
-
-        # Create tmp_tangoSongsMasters.json
-        master_data = [
-            {"artist": artist, "active": "true", "level": "", "similars": []}
-            for artist in sorted(artist_set)
-        ]
-        with open(master_output_path, 'w', encoding='utf-8') as masterfile:
-            json.dump(master_data, masterfile, ensure_ascii=False, indent=2)
-        print(f"Created {len(master_data)} unique artists and saved to {master_output_path}")
+                "Style1": style1,
+                "Alternative": alternative,
+                "Candombe": candombe,
+                "Cancion": cancion
+            }
+
+            # Stream the entry into tangoSongs.json as the next array element, laid out like indent=2
+            jsonfile.write(',\n  ' if record_count else '\n  ')
+            jsonfile.write(dumps_indented(entry).replace('\n', '\n  '))
+            record_count += 1
+
+        jsonfile.write('\n]' if record_count else ']')
+
+    os.replace(tmp_path, output_path)
+    print(f"Processed {record_count} records and saved to {output_path}")
+
+    # Create tmp_tangoSongsMasters.json
+    master_data = [
+        {"artist": artist, "active": "true", "level": "", "similars": []}
+        for artist in sorted(artist_set)
+    ]
+    with open(master_output_path, 'w', encoding='utf-8') as masterfile:
+        masterfile.write(dumps_indented(master_data))
+    print(f"Created {len(master_data)} unique artists and saved to {master_output_path}")
 
 # Input and output paths
 input_csv = Path("~/Downloads/library.csv").expanduser()
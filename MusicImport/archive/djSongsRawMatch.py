@@ -3,6 +3,24 @@ import os
 import logging
 from pathlib import Path
 import unicodedata
+from functools import lru_cache
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class _MarkTable(dict):
+    """str.translate table that deletes nonspacing marks (category Mn), filled lazily per codepoint."""
+
+    def __missing__(self, codepoint):
+        value = None if unicodedata.category(chr(codepoint)) == 'Mn' else codepoint
+        self[codepoint] = value
+        return value
+
+_MARK_TABLE = _MarkTable()
 
 # Configure logging
 logging.basicConfig(
@@ -14,79 +32,111 @@ logging.basicConfig(
     ]
 )
 
+@lru_cache(maxsize=100_000)
 def normalize_filename(name):
     """Normalize a filename by removing diacritics and converting to NFC form."""
-    return ''.join(c for c in unicodedata.normalize('NFD', name) if unicodedata.category(c) != 'Mn')
+    if name.isascii():
+        return name
+    return unicodedata.normalize('NFD', name).translate(_MARK_TABLE)
 
 def load_json(file_path):
     """Load JSON from a file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    # One read of the whole file, parsed straight from bytes (no text-mode decode/buffering layer)
+    raw = Path(file_path).read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
 
 def save_json(data, file_path):
     """Save JSON to a file."""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        Path(file_path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, ensure_ascii=False, indent=2))
     logging.info(f"Saved results to {file_path}")
 
 def find_mp3_files(folder):
-    """Find all MP3 files in a folder."""
-    return [file for file in Path(folder).glob("*.mp3")]
+    """Find all MP3 files in a folder, as os.DirEntry objects (stat results are cached per entry)."""
+    with os.scandir(folder) as entries:
+        return [
+            entry for entry in entries
+            if entry.name.endswith(".mp3") and entry.is_file()
+        ]
+
+def get_file_size(entry):
+    """Return the size of a scanned file in bytes."""
+    return entry.stat().st_size
 
 def match_mp3_to_track_locations(mp3_files, track_locations):
     """Match MP3 files to track locations with normalization."""
     matched_tracks = []
     total_matches = 0
     multiple_matches = 0
-
+    not_found = 0
+    no_size_match = 0
+    # Per-file messages are DEBUG; check once so the hot loops skip the logging call entirely
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+    # Index track locations by normalized filename, parsing filesize once
+    track_index = {}
+    for track in track_locations:
+        try:
+            track_size = int(track['filesize'])
+        except (ValueError, TypeError, KeyError):
+            track_size = None  # Missing or invalid size, never a size match
+        track_index.setdefault(normalize_filename(track['filename']), []).append((track_size, track))
+
+    # Find matches by normalized filename; only MP3s with candidates need a stat
+    candidates = []
     for mp3 in mp3_files:
         mp3_name = mp3.name
-        normalized_mp3_name = normalize_filename(mp3_name)
-        mp3_size = mp3.stat().st_size
-
-        # Find matches by normalized filename
-        matches = [
-            track for track in track_locations
-            if normalize_filename(track['filename']) == normalized_mp3_name
-        ]
+        matches = track_index.get(normalize_filename(mp3_name), ())
 
         if not matches:
-            logging.info(f"File not found in track_locations: {mp3_name}")
+            not_found += 1
+            if debug:
+                logging.debug("File not found in track_locations: %s", mp3_name)
             continue
 
+        candidates.append((mp3, mp3_name, matches))
+
+    # Stat candidate MP3s concurrently; stat latency dominates on external drives
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        mp3_sizes = list(executor.map(get_file_size, (mp3 for mp3, _, _ in candidates)))
+
+    for (mp3, mp3_name, matches), mp3_size in zip(candidates, mp3_sizes):
         total_matches += len(matches)
         if len(matches) > 1:
             multiple_matches += 1
 
-        # Handle multiple matches by filesize
+        # Handle multiple matches by filesize; min() keeps the first of equally close candidates
         closest_match = None
-        min_size_diff = float('inf')
-        for match in matches:
-            try:
-                track_size = int(match['filesize'])
-                size_diff = abs(track_size - mp3_size)
-                if size_diff < min_size_diff:
-                    closest_match = match
-                    min_size_diff = size_diff
-            except ValueError:
-                continue  # Skip invalid sizes
+        size_diffs = [(abs(track_size - mp3_size), match) for track_size, match in matches if track_size is not None]
+        if size_diffs:
+            min_size_diff, closest_match = min(size_diffs, key=itemgetter(0))
 
         if closest_match:
             matched_track = {
                 "djId": closest_match['id'],
                 "filename": closest_match['filename'],
-                "filepath": str(mp3.resolve()),
+                "filepath": mp3.path,
                 "filesize": mp3_size,
                 "closestMatch": closest_match
             }
             matched_tracks.append(matched_track)
-            logging.info(f"Matched file: {mp3_name} (ID: {closest_match['id']}, Size Diff: {min_size_diff})")
+            if debug:
+                logging.debug("Matched file: %s (ID: %s, Size Diff: %s)", mp3_name, closest_match['id'], min_size_diff)
         else:
-            logging.info(f"Multiple matches found for {mp3_name}, but no size match.")
+            no_size_match += 1
+            if debug:
+                logging.debug("Multiple matches found for %s, but no size match.", mp3_name)
 
     logging.info(f"Summary: Found {len(matched_tracks)} exact matches.")
     logging.info(f"Total matches (including duplicates): {total_matches}")
     logging.info(f"Files with multiple matches: {multiple_matches}")
+    logging.info(f"Files not found in track_locations: {not_found}")
+    logging.info(f"Files with matches but no size match: {no_size_match}")
 
     return matched_tracks
 
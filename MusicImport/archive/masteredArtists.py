@@ -18,6 +18,11 @@ import json
 import logging
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -43,8 +48,11 @@ def load_json_file(filepath):
         json.JSONDecodeError: If the file contains invalid JSON.
     """
     try:
-        with filepath.open('r', encoding='utf-8') as f:
-            data = json.load(f)
+        if orjson is not None:
+            data = orjson.loads(filepath.read_bytes())
+        else:
+            with filepath.open('r', encoding='utf-8') as f:
+                data = json.load(f)
         logging.info(f"Loaded {len(data)} records from '{filepath.name}'.")
         return data
     except FileNotFoundError:
@@ -66,8 +74,11 @@ def save_json_file(data, filepath):
         IOError: If writing to the file fails.
     """
     try:
-        with filepath.open('w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            filepath.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with filepath.open('w', encoding='utf-8') as f:
+                f.write(json.dumps(data, ensure_ascii=False, indent=2))
         logging.info(f"Saved {len(data)} records to '{filepath.name}'.")
     except IOError as e:
         logging.error(f"Failed to write to '{filepath.name}': {e}")
@@ -90,18 +101,16 @@ def consolidate_artists(album_artists):
         if not artist_name:
             continue
 
-        if artist_name not in artist_map:
-            # Add the artist with attributes
-            artist_map[artist_name] = {
-                "artist": artist_name,
-                "active": record.get("active", "false"),
-                "level": record.get("level", "0"),
-                "grouped": record.get("grouped", [])
-            }
-        else:
-            # Ensure active status is true if any record has it true
-            if record.get("active", "false") == "true":
-                artist_map[artist_name]["active"] = "true"
+        # Add the artist with attributes from its first record (single lookup)
+        entry = artist_map.setdefault(artist_name, {
+            "artist": artist_name,
+            "active": record.get("active", "false"),
+            "level": record.get("level", "0"),
+            "grouped": record.get("grouped", [])
+        })
+        # Ensure active status is true if any record has it true
+        if record.get("active") == "true":
+            entry["active"] = "true"
 
     logging.info(f"Consolidated {len(artist_map)} unique artists.")
     return list(artist_map.values())
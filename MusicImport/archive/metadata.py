@@ -1,8 +1,8 @@
 import os
 import json
+from concurrent.futures import ProcessPoolExecutor
 from mutagen import File as MutagenFile
 import glob
-import traceback
 
 def get_audio_metadata(file_path):
     """Extract metadata from an audio file."""
@@ -42,26 +42,23 @@ def main():
 
     metadata_results = []
 
-    for i, file_path in enumerate(audio_files):
-        print(f"Processing file {i+1}/{len(audio_files)}: {file_path}")
-        try:
-            metadata = get_audio_metadata(file_path)
+    # Tag parsing is CPU-bound Python, so spread it across processes; chunks amortize pickling
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        all_metadata = executor.map(get_audio_metadata, audio_files, chunksize=64)
+        for i, (file_path, metadata) in enumerate(zip(audio_files, all_metadata)):
+            print(f"Processed file {i+1}/{len(audio_files)}: {file_path}")
             print(f"Metadata: {metadata}\n")
-            
+
             # Append result to the list
             metadata_results.append({
                 "file_path": file_path,
                 "metadata": metadata
             })
 
-        except Exception as e:
-            print(f"Error processing {file_path}: {e}")
-            traceback.print_exc()
-
     # Save metadata results to JSON file
     output_json_path = os.path.expanduser("~/Desktop/audio_metadata.json")
     with open(output_json_path, "w") as json_file:
-        json.dump(metadata_results, json_file, indent=2)
+        json_file.write(json.dumps(metadata_results, indent=2))
     print(f"Metadata saved to: {output_json_path}")
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 import os
-import subprocess
 import json
+import argparse
+import asyncio
 from mutagen import File as MutagenFile
 import glob
 import traceback
@@ -20,15 +21,54 @@ def get_audio_metadata(file_path):
         "album": album[0] if album else None
     }
 
-def convert_to_wav(input_path, output_path):
-    cmd = ["ffmpeg", "-y", "-i", input_path, "-ar", "44100", "-ac", "2", "-c:a", "pcm_s16le", output_path]
+async def convert_to_wav(input_path, output_path):
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y", "-i", input_path, "-ar", "44100", "-ac", "2", "-c:a", "pcm_s16le", output_path]
+    proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+    _, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        print(f"Error converting {input_path} to WAV: ffmpeg exited with status {proc.returncode}")
+        print(stderr.decode('utf-8', errors='replace'))
+        return False
+    return True
+
+async def process_file(sem, file_path):
+    """Extract metadata and convert one file to WAV; returns the result entry or None."""
+    print(f"Processing file: {file_path}")
     try:
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    except subprocess.CalledProcessError as e:
-        print(f"Error converting {input_path} to WAV: {e}")
-        print(e.stderr.decode('utf-8', errors='replace'))
+        metadata = get_audio_metadata(file_path)
+        print(f"Metadata extracted: {metadata}")
+
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        output_wav = os.path.join(os.path.dirname(file_path), base_name + ".wav")
+
+        # The semaphore bounds how many ffmpeg processes run at once
+        async with sem:
+            converted = await convert_to_wav(file_path, output_wav)
+        if converted:
+            print(f"Converted {file_path} to {output_wav}\n")
+
+        return {
+            "original_file": file_path,
+            "wav_file": output_wav,
+            "metadata": metadata
+        }
+
+    except Exception as e:
+        print(f"Error processing {file_path}: {e}")
+        traceback.print_exc()
+        return None
+
+async def process_files(file_paths, jobs):
+    """Run up to `jobs` ffmpeg conversions at a time and collect the successful entries."""
+    sem = asyncio.Semaphore(jobs)
+    results = await asyncio.gather(*(process_file(sem, f) for f in file_paths))
+    return [entry for entry in results if entry is not None]
 
 def main():
+    parser = argparse.ArgumentParser(description="Convert M4A files to WAV with ffmpeg.")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of parallel ffmpeg conversions (default: CPU count).")
+    args = parser.parse_args()
+
     # Adjust this path as needed
     # Example path from screenshot (Note: verify this path actually exists and has M4A files)
     music_folder = os.path.expanduser("~/Music/ooops downgrand/Media.localized/Apple Music/Alfredo de Angelis/Acordes Porteños")
@@ -44,30 +84,12 @@ def main():
 
     print(f"Found {len(m4a_files)} M4A file(s).")
 
-    processed_songs = []
-
-    for i, file_path in enumerate(m4a_files[:50]):  # limit to 50 songs for demonstration
-        print(f"Processing file {i+1}/{len(m4a_files)}: {file_path}")
-        try:
-            metadata = get_audio_metadata(file_path)
-            print(f"Metadata extracted: {metadata}")
-
-            base_name = os.path.splitext(os.path.basename(file_path))[0]
-            output_wav = os.path.join(os.path.dirname(file_path), base_name + ".wav")
-
-            convert_to_wav(file_path, output_wav)
-            print(f"Converted {file_path} to {output_wav}\n")
-
-            # Store the results
-            processed_songs.append({
-                "original_file": file_path,
-                "wav_file": output_wav,
-                "metadata": metadata
-            })
+    files_to_process = m4a_files[:50]  # limit to 50 songs for demonstration
+    jobs = args.jobs or os.cpu_count()
+    print(f"Processing {len(files_to_process)} file(s) with {jobs} parallel job(s).")
 
-        except Exception as e:
-            print(f"Error processing {file_path}: {e}")
-            traceback.print_exc()
+    # Each conversion is its own ffmpeg process, so one event loop waiting on them keeps all cores busy
+    processed_songs = asyncio.run(process_files(files_to_process, jobs))
 
     # Print final JSON output of processed songs
     print("\nAll Processed Songs Metadata:")
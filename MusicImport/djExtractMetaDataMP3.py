@@ -1,21 +1,26 @@
 import os
 import json
 import re
+from concurrent.futures import ProcessPoolExecutor
 from mutagen.mp3 import MP3
-from mutagen.id3 import ID3
+from mutagen.id3 import ID3, TextFrame
 
 # Directory containing the MP3 files
 input_directory = "./djSongsRaw"
 output_json_file = "./djSongsMetadata.json"
 
+# Precompiled patterns for filename cleaning
+_NONWORD_RE = re.compile(r"[^\w\s]")
+_WS_RE = re.compile(r"\s+")
+
 def clean_string_with_extension(filename):
     """
     Cleans a filename by removing special characters while retaining the file extension.
     """
     name, extension = os.path.splitext(filename)
     # Remove accents and special characters from the name
-    cleaned_name = re.sub(r"[^\w\s]", "", name)
-    cleaned_name = re.sub(r"\s+", " ", cleaned_name).strip()  # Normalize spaces
+    cleaned_name = _NONWORD_RE.sub("", name)
+    cleaned_name = _WS_RE.sub(" ", cleaned_name).strip()  # Normalize spaces
     return f"{cleaned_name}{extension}"
 
 # Function to extract metadata from an MP3 file
@@ -26,35 +31,44 @@ def extract_metadata(file_path):
         metadata = {
             "filename": filename,
             "filenameCleanL1": clean_string_with_extension(filename),
-            "attributes": {key: str(value) for key, value in mp3_file.tags.items()},
+            # Text frames only (TIT2, TPE1, TXXX, ...); APIC/PRIV/GEOB binary payloads are skipped
+            "attributes": {key: str(value) for key, value in mp3_file.tags.items() if isinstance(value, TextFrame)},
         }
         return metadata
     except Exception as e:
         print(f"Error reading file {file_path}: {e}")
         return None
 
+# Recursively yield MP3 file paths using os.scandir (no extra stat per entry)
+def iter_mp3_files(input_dir):
+    with os.scandir(input_dir) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_mp3_files(entry.path)
+            elif entry.name.lower().endswith(".mp3"):
+                yield entry.path
+
 # Main logic to process all MP3 files in the directory
 def process_directory(input_dir, output_file):
     if not os.path.exists(input_dir):
         print(f"Input directory does not exist: {input_dir}")
         return
 
+    # ID3 parsing is CPU-bound Python, so spread it across processes; chunks amortize pickling
     metadata_list = []
-    for root, _, files in os.walk(input_dir):
-        for file in files:
-            if file.lower().endswith(".mp3"):
-                file_path = os.path.join(root, file)
-                metadata = extract_metadata(file_path)
-                if metadata:
-                    metadata_list.append(metadata)
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for metadata in executor.map(extract_metadata, iter_mp3_files(input_dir), chunksize=64):
+            if metadata:
+                metadata_list.append(metadata)
 
     # Save all metadata to a JSON file
     try:
         with open(output_file, "w", encoding="utf-8") as json_file:
-            json.dump(metadata_list, json_file, indent=2)
+            json_file.write(json.dumps(metadata_list, indent=2))
         print(f"Metadata saved to {output_file}")
     except Exception as e:
         print(f"Error saving JSON file: {e}")
 
-# Run the script
-process_directory(input_directory, output_json_file)
\ No newline at end of file
+# Run the script (guarded so worker processes can import this module)
+if __name__ == "__main__":
+    process_directory(input_directory, output_json_file)
\ No newline at end of file
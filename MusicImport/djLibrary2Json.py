@@ -1,30 +1,63 @@
 import json
 import uuid
+import hashlib
 import re
 import unicodedata
 import logging
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional Aho-Corasick matcher for the artist substring fallback
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO)
 
+# Precompiled patterns used by the text cleaning functions
+_COMMA_PATTERNS = (
+    (re.compile(r"\bDi Sarli, Carlos\b"), "Carlos Di Sarli"),
+    (re.compile(r"\bDe Angelis, Alfredo\b"), "Alfredo De Angelis")
+)
+_DIARIENZO_RE = re.compile(r"diarienzo", re.IGNORECASE)
+_BRACKETS_RE = re.compile(r"\[.*?\]")
+_GENRE_RE = re.compile(r"tango|vals|waltz|milonga|marcha")
+
+# Namespace prefix hashed into every deterministic song ID
+_NAMESPACE_DNS_BYTES = uuid.NAMESPACE_DNS.bytes
+
+class _MarkTable(dict):
+    """str.translate table that deletes nonspacing marks (category Mn), filled lazily per codepoint."""
+
+    def __missing__(self, codepoint):
+        value = None if unicodedata.category(chr(codepoint)) == 'Mn' else codepoint
+        self[codepoint] = value
+        return value
+
+_MARK_TABLE = _MarkTable()
+
+@lru_cache(maxsize=100_000)
 def clean_special_characters(text):
     """Remove diacritics and special characters."""
     if not text:
         return ""
-    cleaned_text = ''.join(c for c in unicodedata.normalize('NFD', text) 
-                           if unicodedata.category(c) != 'Mn')
-    return cleaned_text.strip().lstrip('.')
+    if not text.isascii():
+        text = unicodedata.normalize('NFD', text).translate(_MARK_TABLE)
+    return text.strip().lstrip('.')
 
 def clean_commas(text):
     """Reformat comma-separated names like 'Last, First' for specific patterns."""
     if not text:
         return ""
-    patterns = [
-        (r"\bDi Sarli, Carlos\b", "Carlos Di Sarli"),
-        (r"\bDe Angelis, Alfredo\b", "Alfredo De Angelis")
-    ]
-    for pattern, replacement in patterns:
-        text = re.sub(pattern, replacement, text)
+    for pattern, replacement in _COMMA_PATTERNS:
+        text = pattern.sub(replacement, text)
     if ',' in text:
         parts = text.split(',')
         if len(parts) == 2 and len(parts[1].split()) <= 2:
@@ -35,19 +68,34 @@ def fix_di_arienzo(text):
     """Replace all occurrences of 'DiArienzo' (case-insensitive) with 'D'Arienzo'."""
     if not text:
         return ""
-    return re.sub(r"diarienzo", "D'Arienzo", text, flags=re.IGNORECASE)
+    return _DIARIENZO_RE.sub("D'Arienzo", text)
 
 def remove_square_brackets(text):
     """Remove any content inside square brackets and the brackets themselves."""
     if not text:
         return ""
-    return re.sub(r"\[.*?\]", "", text).strip()
+    return _BRACKETS_RE.sub("", text).strip()
 
-def determine_style1(genre):
-    """Determine Style1 based on genre."""
-    if not genre:
-        return "Unknown"
-    genre_lower = genre.lower()
+@lru_cache(maxsize=100_000)
+def clean_song_title(text):
+    """Clean a song title: strip diacritics and fix DiArienzo, memoized per distinct title."""
+    return fix_di_arienzo(clean_special_characters(text))
+
+@lru_cache(maxsize=100_000)
+def clean_album_title(text):
+    """Clean an album title; returns (L1, L2) where L2 also drops [bracketed] content."""
+    clean_l1 = fix_di_arienzo(clean_special_characters(text))
+    return clean_l1, remove_square_brackets(clean_l1)
+
+@lru_cache(maxsize=100_000)
+def clean_artist(text):
+    """Clean an artist name; returns (L1, L2, lowercased L2) where L2 also swaps 'Last, First'."""
+    clean_l1 = clean_special_characters(text)
+    clean_l2 = clean_commas(clean_l1)
+    return clean_l1, clean_l2, clean_l2.lower()
+
+def determine_style1(genre_lower):
+    """Determine Style1 based on the lowercased genre."""
     if 'tango' in genre_lower:
         return "Tango"
     if 'vals' in genre_lower or 'waltz' in genre_lower:
@@ -58,92 +106,123 @@ def determine_style1(genre):
         return "Marcha"
     return "Unknown"
 
-def determine_alternative(genre):
-    """Determine if 'Alternative' applies."""
-    if not genre:
-        return "N"
-    genre_lower = genre.lower()
+def determine_alternative(genre_lower):
+    """Determine if 'Alternative' applies to the lowercased genre."""
     if any(kw in genre_lower for kw in ['alt', 'alt.', 'alternative']) and 'waltz' not in genre_lower:
         return "Y"
     if 'alt waltz' in genre_lower or 'alternative waltz' in genre_lower:
         return "Y"
     return "N"
 
-def determine_candombe(genre):
-    """Determine if 'Candombe' applies."""
-    if not genre:
-        return "N"
-    return "Y" if 'candombe' in genre.lower() else "N"
+def determine_candombe(genre_lower):
+    """Determine if 'Candombe' applies to the lowercased genre."""
+    return "Y" if 'candombe' in genre_lower else "N"
 
-def determine_cancion(genre):
-    """Determine if Cancion applies."""
-    if not genre:
-        return "N"
-    return "Y" if 'canción' in genre.lower() or 'cancion' in genre.lower() else "N"
+def determine_cancion(genre_lower):
+    """Determine if Cancion applies to the lowercased genre."""
+    return "Y" if 'canción' in genre_lower or 'cancion' in genre_lower else "N"
+
+@lru_cache(maxsize=None)
+def classify_genre(genre):
+    """Return (Style1, Alternative, Candombe, Cancion) for a tango genre, or None if it is not one."""
+    genre_lower = genre.lower()
+    if not _GENRE_RE.search(genre_lower):
+        return None
+    return (determine_style1(genre_lower), determine_alternative(genre_lower),
+            determine_candombe(genre_lower), determine_cancion(genre_lower))
 
 def load_json(file_path):
     """Load JSON from a file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    # One read of the whole file, parsed straight from bytes (no text-mode decode/buffering layer)
+    raw = Path(file_path).read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
 
 def save_json(data, file_path):
     """Save JSON to a file."""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        Path(file_path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, ensure_ascii=False, indent=2))
     logging.info(f"Saved results to {file_path}")
 
 def generate_deterministic_song_id(album_title, song_title):
     """Generate a deterministic UUID v5 based on album and song title."""
-    namespace = uuid.NAMESPACE_DNS  # Fixed namespace
     input_string = f"{album_title}::{song_title}"
-    return str(uuid.uuid5(namespace, input_string))
+    # Same bytes as str(uuid.uuid5(uuid.NAMESPACE_DNS, input_string)), without building a UUID object
+    digest = bytearray(hashlib.sha1(_NAMESPACE_DNS_BYTES + input_string.encode('utf-8')).digest()[:16])
+    digest[6] = (digest[6] & 0x0f) | 0x50  # version 5
+    digest[8] = (digest[8] & 0x3f) | 0x80  # RFC 4122 variant
+    h = digest.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+def build_master_artist_automaton(master_artists):
+    """Build an Aho-Corasick automaton over the master artist keys, or None if pyahocorasick is missing."""
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    automaton = ahocorasick.Automaton()
+    for priority, (ma_key, ma_val) in enumerate(master_artists.items()):
+        if ma_key:
+            automaton.add_word(ma_key, (priority, ma_val))
+    if len(automaton) == 0:
+        return None
+    automaton.make_automaton()
+    return automaton
+
+def find_master_artist(lowered_artist, master_artists, automaton=None):
+    """Return the master artist whose key equals or is contained in the lowercased artist, or ""."""
+    if lowered_artist in master_artists:
+        return master_artists[lowered_artist]
+    if automaton is not None:
+        # Lowest priority is the earliest key in master_artists, the same one the linear scan returns
+        hits = [value for _, value in automaton.iter(lowered_artist)]
+        return min(hits)[1] if hits else ""
+    for ma_key, ma_val in master_artists.items():
+        if ma_key in lowered_artist:
+            return ma_val
+    return ""
 
 def process_library(library_path, artist_master_path, output_path, not_found_path):
     library = load_json(library_path)
     artist_master_list = load_json(artist_master_path)
     master_artists = {a["artist"].lower(): a["artist"] for a in artist_master_list}
+    master_automaton = build_master_artist_automaton(master_artists)
+    # Lowercased clean artist -> resolved master artist; artist strings repeat across many songs
+    resolved_artists = {}
 
     results = []
-    not_found_artists = set()
-
-    valid_genres = ['tango', 'vals', 'waltz', 'milonga', 'marcha']
+    # Lowercased clean artist -> first original spelling seen; one entry per ArtistMaster lookup key
+    not_found_artists = {}
 
     for record in library:
         genre = record.get('genre', '')
-        if not genre or not any(vg in genre.lower() for vg in valid_genres):
+        if not genre:
+            continue
+        # A library has only a handful of distinct genres, so classification is cached per value
+        genre_flags = classify_genre(genre)
+        if genre_flags is None:
             continue
+        style1, alternative, candombe, cancion = genre_flags
 
         dj_id = record.get('id', "")
         song_title_original = record.get('title', '')
-        song_title_clean_l1 = clean_special_characters(song_title_original)
-        song_title_clean_l1 = fix_di_arienzo(song_title_clean_l1)  # Fix DiArienzo
+        song_title_clean_l1 = clean_song_title(song_title_original)  # Includes the DiArienzo fix
 
         album_title_original = record.get('album', '')
-        album_title_clean_l1 = clean_special_characters(album_title_original)
-        album_title_clean_l1 = fix_di_arienzo(album_title_clean_l1)  # Fix DiArienzo
-        album_title_clean_l2 = remove_square_brackets(album_title_clean_l1)
+        album_title_clean_l1, album_title_clean_l2 = clean_album_title(album_title_original)
 
         artist_original = record.get('artist', '') or ""
-        artist_clean_l1 = clean_special_characters(artist_original)
-        artist_clean_l2 = clean_commas(artist_clean_l1)
-
-        matched_artist = ""
-        lowered_clean_artist = artist_clean_l2.lower()
-        if lowered_clean_artist in master_artists:
-            matched_artist = master_artists[lowered_clean_artist]
-        else:
-            for ma_key, ma_val in master_artists.items():
-                if ma_key in lowered_clean_artist:
-                    matched_artist = ma_val
-                    break
+        artist_clean_l1, artist_clean_l2, lowered_clean_artist = clean_artist(artist_original)
 
-        if not matched_artist and artist_original:
-            not_found_artists.add(artist_original)
+        matched_artist = resolved_artists.get(lowered_clean_artist)
+        if matched_artist is None:
+            matched_artist = find_master_artist(lowered_clean_artist, master_artists, master_automaton)
+            resolved_artists[lowered_clean_artist] = matched_artist
 
-        style1 = determine_style1(genre)
-        alternative = determine_alternative(genre)
-        candombe = determine_candombe(genre)
-        cancion = determine_cancion(genre)
+        if not matched_artist and artist_original:
+            not_found_artists.setdefault(lowered_clean_artist, artist_original)
 
         song_id = generate_deterministic_song_id(album_title_original, song_title_original)
 
@@ -167,8 +246,8 @@ def process_library(library_path, artist_master_path, output_path, not_found_pat
 
     save_json(results, output_path)
 
-    not_found_list = [artist for artist in not_found_artists if artist]
-    not_found_data = [{"artist": artist} for artist in sorted(not_found_list)]
+    # Originals are only recorded when non-empty, and the lowercased keys sort case-insensitively
+    not_found_data = [{"artist": not_found_artists[key]} for key in sorted(not_found_artists)]
     save_json(not_found_data, not_found_path)
 
     logging.info(f"Processed {len(results)} songs matching the filter criteria.")
@@ -13,12 +13,26 @@ Usage:
 
 import json
 import uuid
+import hashlib
 import re
 import unicodedata
 import argparse
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 
+# Optional Aho-Corasick matcher for the artist substring fallback
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configuration
 SOURCES = {
     'boris': {
@@ -43,6 +57,13 @@ VALID_GENRES = ['tango', 'vals', 'waltz', 'milonga', 'marcha']
 # Genres to EXCLUDE (not dance music)
 EXCLUDE_GENRES = ['cortina']
 
+# Namespace prefix hashed into every deterministic song ID
+_NAMESPACE_DNS_BYTES = uuid.NAMESPACE_DNS.bytes
+
+# Single-pass matchers for the genre lists above
+_VALID_GENRE_RE = re.compile('|'.join(map(re.escape, VALID_GENRES)))
+_EXCLUDE_GENRE_RE = re.compile('|'.join(map(re.escape, EXCLUDE_GENRES)))
+
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Filter library to tango songs')
@@ -61,25 +82,42 @@ def parse_args():
 # TEXT CLEANING FUNCTIONS
 # =============================================================================
 
+# Precompiled patterns used by the text cleaning functions
+_COMMA_PATTERNS = (
+    (re.compile(r"\bDi Sarli, Carlos\b"), "Carlos Di Sarli"),
+    (re.compile(r"\bDe Angelis, Alfredo\b"), "Alfredo De Angelis")
+)
+_DIARIENZO_RE = re.compile(r"diarienzo", re.IGNORECASE)
+_BRACKETS_RE = re.compile(r"\[.*?\]")
+
+class _MarkTable(dict):
+    """str.translate table that deletes nonspacing marks (category Mn), filled lazily per codepoint."""
+
+    def __missing__(self, codepoint):
+        value = None if unicodedata.category(chr(codepoint)) == 'Mn' else codepoint
+        self[codepoint] = value
+        return value
+
+
+_MARK_TABLE = _MarkTable()
+
+
+@lru_cache(maxsize=100_000)
 def clean_special_characters(text):
     """Remove diacritics and special characters."""
     if not text:
         return ""
-    cleaned_text = ''.join(c for c in unicodedata.normalize('NFD', text)
-                           if unicodedata.category(c) != 'Mn')
-    return cleaned_text.strip().lstrip('.')
+    if not text.isascii():
+        text = unicodedata.normalize('NFD', text).translate(_MARK_TABLE)
+    return text.strip().lstrip('.')
 
 
 def clean_commas(text):
     """Reformat comma-separated names like 'Last, First'."""
     if not text:
         return ""
-    patterns = [
-        (r"\bDi Sarli, Carlos\b", "Carlos Di Sarli"),
-        (r"\bDe Angelis, Alfredo\b", "Alfredo De Angelis")
-    ]
-    for pattern, replacement in patterns:
-        text = re.sub(pattern, replacement, text)
+    for pattern, replacement in _COMMA_PATTERNS:
+        text = pattern.sub(replacement, text)
     if ',' in text:
         parts = text.split(',')
         if len(parts) == 2 and len(parts[1].split()) <= 2:
@@ -91,25 +129,43 @@ def fix_di_arienzo(text):
     """Replace DiArienzo with D'Arienzo."""
     if not text:
         return ""
-    return re.sub(r"diarienzo", "D'Arienzo", text, flags=re.IGNORECASE)
+    return _DIARIENZO_RE.sub("D'Arienzo", text)
 
 
 def remove_square_brackets(text):
     """Remove content inside square brackets."""
     if not text:
         return ""
-    return re.sub(r"\[.*?\]", "", text).strip()
+    return _BRACKETS_RE.sub("", text).strip()
+
+
+@lru_cache(maxsize=100_000)
+def clean_song_title(text):
+    """Clean a song title: strip diacritics and fix DiArienzo, memoized per distinct title."""
+    return fix_di_arienzo(clean_special_characters(text))
+
+
+@lru_cache(maxsize=100_000)
+def clean_album_title(text):
+    """Clean an album title; returns (L1, L2) where L2 also drops [bracketed] content."""
+    clean_l1 = fix_di_arienzo(clean_special_characters(text))
+    return clean_l1, remove_square_brackets(clean_l1)
+
+
+@lru_cache(maxsize=100_000)
+def clean_artist(text):
+    """Clean an artist name; returns (L1, L2, lowercased L2) where L2 also swaps 'Last, First'."""
+    clean_l1 = clean_special_characters(text)
+    clean_l2 = clean_commas(clean_l1)
+    return clean_l1, clean_l2, clean_l2.lower()
 
 
 # =============================================================================
 # CLASSIFICATION FUNCTIONS
 # =============================================================================
 
-def determine_style(genre):
-    """Determine Style based on genre."""
-    if not genre:
-        return "Unknown"
-    genre_lower = genre.lower()
+def determine_style(genre_lower):
+    """Determine Style based on the lowercased genre."""
     if 'tango' in genre_lower:
         return "Tango"
     if 'vals' in genre_lower or 'waltz' in genre_lower:
@@ -121,28 +177,28 @@ def determine_style(genre):
     return "Unknown"
 
 
-def determine_alternative(genre):
+def determine_alternative(genre_lower):
     """Determine if Alternative."""
-    if not genre:
-        return "N"
-    genre_lower = genre.lower()
     if any(kw in genre_lower for kw in ['alt', 'alternative', 'neo']):
         return "Y"
     return "N"
 
 
-def determine_candombe(genre):
+def determine_candombe(genre_lower):
     """Determine if Candombe."""
-    if not genre:
-        return "N"
-    return "Y" if 'candombe' in genre.lower() else "N"
+    return "Y" if 'candombe' in genre_lower else "N"
 
 
-def determine_cancion(genre):
+def determine_cancion(genre_lower):
     """Determine if Cancion."""
-    if not genre:
-        return "N"
-    return "Y" if 'canción' in genre.lower() or 'cancion' in genre.lower() else "N"
+    return "Y" if 'canción' in genre_lower or 'cancion' in genre_lower else "N"
+
+
+@lru_cache(maxsize=None)
+def classify_genre(genre_lower):
+    """Return (Style, Alternative, Candombe, Cancion) for a lowercased genre, cached per distinct value."""
+    return (determine_style(genre_lower), determine_alternative(genre_lower),
+            determine_candombe(genre_lower), determine_cancion(genre_lower))
 
 
 def calculate_priority_tier(record):
@@ -184,33 +240,79 @@ def calculate_priority_score(record):
 
 def generate_song_id(album_title, song_title):
     """Generate deterministic UUID v5 based on album and song title."""
-    namespace = uuid.NAMESPACE_DNS
     input_string = f"{album_title}::{song_title}"
-    return str(uuid.uuid5(namespace, input_string))
+    # Same bytes as str(uuid.uuid5(uuid.NAMESPACE_DNS, input_string)), without building a UUID object
+    digest = bytearray(hashlib.sha1(_NAMESPACE_DNS_BYTES + input_string.encode('utf-8')).digest()[:16])
+    digest[6] = (digest[6] & 0x0f) | 0x50  # version 5
+    digest[8] = (digest[8] & 0x3f) | 0x80  # RFC 4122 variant
+    h = digest.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+# =============================================================================
+# JSON I/O
+# =============================================================================
+
+def load_json(file_path):
+    """Load JSON from a file, parsed straight from its bytes."""
+    raw = Path(file_path).read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def save_json(data, file_path):
+    """Save data to a JSON file with 2-space indentation."""
+    if orjson is not None:
+        Path(file_path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, ensure_ascii=False, indent=2))
 
 
 # =============================================================================
 # MAIN PROCESSING
 # =============================================================================
 
-def is_valid_genre(genre):
-    """Check if genre is a valid tango genre (not cortina, etc.)"""
-    if not genre:
+def is_valid_genre(genre_lower):
+    """Check if a lowercased genre is a valid tango genre (not cortina, etc.)"""
+    if not genre_lower:
         return False
 
-    genre_lower = genre.lower()
-
     # Exclude non-dance genres
-    for exclude in EXCLUDE_GENRES:
-        if exclude in genre_lower:
-            return False
+    if _EXCLUDE_GENRE_RE.search(genre_lower):
+        return False
 
     # Include valid tango genres
-    for valid in VALID_GENRES:
-        if valid in genre_lower:
-            return True
-
-    return False
+    return _VALID_GENRE_RE.search(genre_lower) is not None
+
+
+def build_master_artist_automaton(master_artists):
+    """Build an Aho-Corasick automaton over the master artist keys, or None if pyahocorasick is missing."""
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    automaton = ahocorasick.Automaton()
+    for priority, (ma_key, ma_val) in enumerate(master_artists.items()):
+        if ma_key:
+            automaton.add_word(ma_key, (priority, ma_val))
+    if len(automaton) == 0:
+        return None
+    automaton.make_automaton()
+    return automaton
+
+
+def find_master_artist(lowered_artist, master_artists, automaton=None):
+    """Return the master artist whose key equals or is contained in the lowercased artist, or ""."""
+    if lowered_artist in master_artists:
+        return master_artists[lowered_artist]
+    if automaton is not None:
+        # Lowest priority is the earliest key in master_artists, the same one the linear scan returns
+        hits = [value for _, value in automaton.iter(lowered_artist)]
+        return min(hits)[1] if hits else ""
+    for ma_key, ma_val in master_artists.items():
+        if ma_key in lowered_artist:
+            return ma_val
+    return ""
 
 
 def process_library(source_config, artist_master_path, dry_run=False, sample=0):
@@ -235,8 +337,7 @@ def process_library(source_config, artist_master_path, dry_run=False, sample=0):
         print(f"Run extractMixxxSqlite.py first to create it.")
         return None, None, None
 
-    with open(library_path, 'r', encoding='utf-8') as f:
-        library = json.load(f)
+    library = load_json(library_path)
 
     print(f"Loaded {len(library):,} records from library")
 
@@ -246,11 +347,13 @@ def process_library(source_config, artist_master_path, dry_run=False, sample=0):
         print(f"WARNING: ArtistMaster.json not found, will skip artist matching")
         artist_master_list = []
     else:
-        with open(artist_master_path, 'r', encoding='utf-8') as f:
-            artist_master_list = json.load(f)
+        artist_master_list = load_json(artist_master_path)
         print(f"Loaded {len(artist_master_list)} artists from ArtistMaster")
 
     master_artists = {a["artist"].lower(): a["artist"] for a in artist_master_list}
+    master_automaton = build_master_artist_automaton(master_artists)
+    # Lowercased clean artist -> resolved master artist; artist strings repeat across many songs
+    resolved_artists = {}
 
     # Process records
     results = []
@@ -267,9 +370,10 @@ def process_library(source_config, artist_master_path, dry_run=False, sample=0):
 
     for record in library:
         genre = record.get('genre', '')
+        genre_lower = genre.lower() if genre else ''  # lowered once and shared below
 
         # Filter to tango genres
-        if not is_valid_genre(genre):
+        if not is_valid_genre(genre_lower):
             stats['filtered_out'] += 1
             continue
 
@@ -279,25 +383,19 @@ def process_library(source_config, artist_master_path, dry_run=False, sample=0):
         # Extract and clean fields
         dj_id = record.get('id', "")
         song_title_original = record.get('title', '') or ''
-        song_title_clean = fix_di_arienzo(clean_special_characters(song_title_original))
+        song_title_clean = clean_song_title(song_title_original)
 
         album_title_original = record.get('album', '') or ''
-        album_title_clean = fix_di_arienzo(clean_special_characters(album_title_original))
-        album_title_clean_l2 = remove_square_brackets(album_title_clean)
+        album_title_clean, album_title_clean_l2 = clean_album_title(album_title_original)
 
         artist_original = record.get('artist', '') or ''
-        artist_clean = clean_commas(clean_special_characters(artist_original))
+        _, artist_clean, lowered_artist = clean_artist(artist_original)
 
         # Match to ArtistMaster
-        matched_artist = ""
-        lowered_artist = artist_clean.lower()
-        if lowered_artist in master_artists:
-            matched_artist = master_artists[lowered_artist]
-        else:
-            for ma_key, ma_val in master_artists.items():
-                if ma_key in lowered_artist:
-                    matched_artist = ma_val
-                    break
+        matched_artist = resolved_artists.get(lowered_artist)
+        if matched_artist is None:
+            matched_artist = find_master_artist(lowered_artist, master_artists, master_automaton)
+            resolved_artists[lowered_artist] = matched_artist
 
         if matched_artist:
             stats['with_artist_master'] += 1
@@ -305,10 +403,7 @@ def process_library(source_config, artist_master_path, dry_run=False, sample=0):
             not_found_artists.add(artist_original)
 
         # Determine classifications
-        style = determine_style(genre)
-        alternative = determine_alternative(genre)
-        candombe = determine_candombe(genre)
-        cancion = determine_cancion(genre)
+        style, alternative, candombe, cancion = classify_genre(genre_lower)
 
         # Priority scoring (NEW in v2.0)
         priority_tier = calculate_priority_tier(record)
@@ -410,8 +505,7 @@ def save_results(results, not_found_artists, source_config, dry_run=False, sampl
         return
 
     # Save tango songs
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    save_json(output_data, output_path)
 
     file_size = output_path.stat().st_size
     print(f"\n✓ Saved {len(output_data):,} records to: {output_path}")
@@ -419,8 +513,7 @@ def save_results(results, not_found_artists, source_config, dry_run=False, sampl
 
     # Save unmatched artists
     not_found_data = [{"artist": a} for a in sorted(not_found_artists) if a]
-    with open(not_found_path, 'w', encoding='utf-8') as f:
-        json.dump(not_found_data, f, ensure_ascii=False, indent=2)
+    save_json(not_found_data, not_found_path)
 
     print(f"✓ Saved {len(not_found_data)} unmatched artists to: {not_found_path}")
 
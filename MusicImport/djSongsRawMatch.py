@@ -3,9 +3,19 @@ import os
 import logging
 from pathlib import Path
 import unicodedata
+from functools import lru_cache
+from operator import itemgetter
 import shutil
-from mutagen.id3 import ID3, TIT2, TALB, TPE1, TCON, COMM, error
-from mutagen.mp3 import MP3
+import sys
+import ctypes
+import ctypes.util
+from concurrent.futures import ThreadPoolExecutor
+from mutagen.id3 import ID3, ID3NoHeaderError, TIT2, TALB, TPE1, TCON, COMM
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # --------------------------------------
 # Configuration
@@ -16,12 +26,15 @@ TARGET_FOLDER = Path("/Volumes/External SSD 1T/NTTTUpload").resolve()
 
 TRACK_LOCATIONS_FILE = Path("./djTrack_locations.json").resolve()
 TANGO_SONGS_FILE = Path("./djTangoSongs.json").resolve()
-MATCHED_OUTPUT_FILE = Path("./djMatchedSongs.json").resolve()
+MATCHED_OUTPUT_FILE = Path("./djMatchedSongs.jsonl").resolve()  # JSON Lines
 SONGS_JSON_FILE = Path("./djSongs.json").resolve()
-UNMATCHED_OUTPUT_FILE = Path("./djUnMatchedSongs.json").resolve()
+UNMATCHED_OUTPUT_FILE = Path("./djUnMatchedSongs.jsonl").resolve()  # JSON Lines
 
 LOG_FILE = "djMatch.log"
 
+# "reflink" clones the MP3s copy-on-write when the volume supports it; "copy" always copies bytes
+LINK_MODE = "reflink"
+
 # --------------------------------------
 # Logging Configuration
 # --------------------------------------
@@ -35,51 +48,135 @@ logging.basicConfig(
 )
 
 
+def mp3_tags_match(tags, song_metadata):
+    """Check whether existing ID3 tags already hold the values update_mp3_metadata would write."""
+    if tags is None:
+        return False
+    expected = {
+        "TIT2": song_metadata['Title'],
+        "TALB": song_metadata['Album'],
+        "TPE1": song_metadata['ArtistMaster'],
+        "TCON": song_metadata['Style'],
+        "COMM:Comment:eng": f"SongID: {song_metadata['SongID']}",
+    }
+    for key, value in expected.items():
+        frame = tags.get(key)
+        if frame is None or frame.text != [value]:
+            return False
+    return True
+
+
 def update_mp3_metadata(mp3_file, song_metadata):
     """Update MP3 metadata using Mutagen."""
     try:
-        audio = MP3(mp3_file, ID3=ID3)
-
-        # If no ID3 tag exists, create one
+        # Only the ID3 tag is read; the MPEG audio frames are never parsed
         try:
-            audio.add_tags()
-        except error:
-            pass
+            tags = ID3(mp3_file)
+        except ID3NoHeaderError:
+            tags = ID3()  # If no ID3 tag exists, create one
+
+        # Re-runs: skip the rewrite when the file is already tagged identically
+        if mp3_tags_match(tags, song_metadata):
+            logging.debug("Metadata already up to date for %s", mp3_file)
+            return
 
         # Update metadata fields
-        audio.tags["TIT2"] = TIT2(encoding=3, text=song_metadata['Title'])  # Title
-        audio.tags["TALB"] = TALB(encoding=3, text=song_metadata['Album'])  # Album
-        audio.tags["TPE1"] = TPE1(encoding=3, text=song_metadata['ArtistMaster'])  # Artist
-        audio.tags["TCON"] = TCON(encoding=3, text=song_metadata['Style'])  # Genre/Style
-        audio.tags["COMM"] = COMM(encoding=3, lang="eng", desc="Comment", text=f"SongID: {song_metadata['SongID']}")  # SongID in comments
-
-        audio.save()
-        logging.info(f"Updated metadata for {mp3_file}")
+        tags["TIT2"] = TIT2(encoding=3, text=song_metadata['Title'])  # Title
+        tags["TALB"] = TALB(encoding=3, text=song_metadata['Album'])  # Album
+        tags["TPE1"] = TPE1(encoding=3, text=song_metadata['ArtistMaster'])  # Artist
+        tags["TCON"] = TCON(encoding=3, text=song_metadata['Style'])  # Genre/Style
+        tags["COMM"] = COMM(encoding=3, lang="eng", desc="Comment", text=f"SongID: {song_metadata['SongID']}")  # SongID in comments
+
+        # Keep at least 1 KiB of padding so later tag edits fit in place without rewriting the audio
+        tags.save(mp3_file, padding=lambda info: max(1024, info.padding))
+        logging.info("Updated metadata for %s", mp3_file)
     except Exception as e:
         logging.error(f"Failed to update metadata for {mp3_file}: {e}")
 
 
+class _MarkTable(dict):
+    """str.translate table that deletes nonspacing marks (category Mn), filled lazily per codepoint."""
+
+    def __missing__(self, codepoint):
+        value = None if unicodedata.category(chr(codepoint)) == 'Mn' else codepoint
+        self[codepoint] = value
+        return value
+
+
+_MARK_TABLE = _MarkTable()
+
+
+@lru_cache(maxsize=None)
 def normalize_filename(name):
     """Normalize a filename by removing diacritics and converting to NFC form."""
-    return ''.join(c for c in unicodedata.normalize('NFD', name) if unicodedata.category(c) != 'Mn')
+    if name.isascii():
+        return name
+    return unicodedata.normalize('NFD', name).translate(_MARK_TABLE)
 
 
 def load_json(file_path):
     """Load JSON from a file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    # One read of the whole file, parsed straight from bytes (no text-mode decode/buffering layer)
+    raw = Path(file_path).read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
 
 
 def save_json(data, file_path):
     """Save JSON to a file."""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        Path(file_path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, ensure_ascii=False, indent=2))
     logging.info(f"Saved results to {file_path}")
 
 
+def scan_mp3_entries(folder):
+    """Collect MP3 files under a folder as os.DirEntry objects, walking with os.scandir."""
+    entries = []
+    stack = [folder]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".mp3"):
+                    entries.append(entry)
+    return entries
+
+
+def save_json_lines(records, file_path):
+    """Write an iterable of records to a JSON Lines file, one record per line, without building a list."""
+    count = 0
+    # 1 MiB write buffer: records are small, so the default 8 KiB buffer would flush every few dozen lines
+    with open(file_path, 'wb', buffering=1 << 20) as f:
+        for record in records:
+            if orjson is not None:
+                f.write(orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS))
+            else:
+                f.write(json.dumps(record, ensure_ascii=False).encode('utf-8'))
+            f.write(b"\n")
+            count += 1
+    logging.info(f"Saved {count} records to {file_path}")
+
+
 def find_mp3_files(folder):
-    """Recursively find all MP3 files in a folder and its subdirectories."""
-    return [file for file in Path(folder).rglob("*.mp3")]
+    """Recursively find all MP3 files in a folder and its subdirectories, as os.DirEntry objects."""
+    mp3_files = []
+    subfolders = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subfolders.append(entry.path)
+            elif entry.name.endswith(".mp3"):
+                mp3_files.append(entry)
+    # Walk each top-level subfolder (one per artist) on its own thread; the walk is directory-read latency bound
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for entries in executor.map(scan_mp3_entries, subfolders):
+            mp3_files.extend(entries)
+    return mp3_files
 
 
 def get_subpath_after_mixxx(path_str):
@@ -90,22 +187,37 @@ def get_subpath_after_mixxx(path_str):
         return ""
     return norm_path[idx + len('mixxx/'):].strip("/")
 
-def match_mp3_to_track_locations(mp3_files, track_locations, djId_to_songID, unmatched_songs):
+def match_mp3_to_track_locations(mp3_files, track_locations, djId_to_songID, unmatched_songs, source_folder=SOURCE_FOLDER):
     matched_tracks = []
     total_processed = 0
     total_matched = 0
     total_unmatched = 0
 
-    # Index track locations by full normalized subpath (directory + filename)
+    # Index track locations by full normalized subpath (directory + filename),
+    # parsing each filesize once
     track_index = {}
     for tl in track_locations:
         tl_subpath = get_subpath_after_mixxx(tl['location'])
         normalized_tl_subpath = normalize_filename(tl_subpath)  # normalize the entire subpath
         key = normalized_tl_subpath.lower()
-        track_index.setdefault(key, []).append(tl)
+        try:
+            tl_size = int(tl['filesize'])
+        except (ValueError, TypeError, KeyError):
+            tl_size = None  # Missing or invalid size, never a size match
+        track_index.setdefault(key, []).append((tl_size, tl))
+
+    # Scanned MP3 paths all start with source_folder. If the 'mixxx/' search lands exactly at the end of that
+    # prefix, slicing the prefix off yields the same subpath without a lower()/find() over every path.
+    source_prefix = os.path.join(str(source_folder), "")
+    slice_prefix = get_subpath_after_mixxx(source_prefix + "x") == "x"
 
     for mp3 in mp3_files:
-        mp3_subpath = get_subpath_after_mixxx(str(mp3.resolve()))
+        # mp3 is already absolute (SOURCE_FOLDER is resolved once), so no per-file resolve()
+        mp3_path = mp3.path
+        if slice_prefix and mp3_path.startswith(source_prefix):
+            mp3_subpath = mp3_path[len(source_prefix):].replace('\\', '/').strip("/")
+        else:
+            mp3_subpath = get_subpath_after_mixxx(mp3_path)
         normalized_mp3_subpath = normalize_filename(mp3_subpath)
         mp3_key = normalized_mp3_subpath.lower()
 
@@ -116,40 +228,44 @@ def match_mp3_to_track_locations(mp3_files, track_locations, djId_to_songID, unm
             # No matches found
             unmatched_songs.append({
                 "filename": mp3.name,
-                "fullpath": str(mp3.resolve()),
+                "fullpath": mp3_path,
                 "normalized_mp3_subpath": normalized_mp3_subpath,
             })
             total_unmatched += 1
         else:
-            # Check by filesize
-            mp3_size = mp3.stat().st_size
-            closest_match = None
-            min_size_diff = float('inf')
-            for match in possible_matches:
-                try:
-                    track_size = int(match['filesize'])
-                    size_diff = abs(track_size - mp3_size)
-                    if size_diff < min_size_diff:
-                        closest_match = match
-                        min_size_diff = size_diff
-                except ValueError:
-                    continue
+            if len(possible_matches) == 1:
+                # A lone candidate needs no size comparison, so the stat is deferred until a match is recorded
+                track_size, closest_match = possible_matches[0]
+                if track_size is None:
+                    closest_match = None
+                mp3_size = None
+            else:
+                # Check by filesize; min() keeps the first of equally close candidates
+                mp3_size = mp3.stat().st_size
+                closest_match = None
+                size_diffs = [(abs(track_size - mp3_size), match)
+                              for track_size, match in possible_matches if track_size is not None]
+                if size_diffs:
+                    closest_match = min(size_diffs, key=itemgetter(0))[1]
 
             if closest_match:
                 dj_id_str = str(closest_match['id'])
                 if dj_id_str in djId_to_songID:
                     song_id = djId_to_songID[dj_id_str]
+                    if mp3_size is None:
+                        mp3_size = mp3.stat().st_size
                     matched_tracks.append({
                         "songID": song_id,
                         "filename": closest_match['filename'],
-                        "filepath": str(mp3.resolve()),
-                        "filesize": mp3_size
+                        "filepath": mp3_path,
+                        "filesize": mp3_size,
+                        "mp3": mp3  # DirEntry reused by the copy step (path-like)
                     })
                     total_matched += 1
                 else:
                     unmatched_songs.append({
                         "filename": mp3.name,
-                        "fullpath": str(mp3.resolve()),
+                        "fullpath": mp3_path,
                         "normalized_mp3_subpath": normalized_mp3_subpath,
                         "closest_match_location": closest_match['location'],
                         "closest_match_filename": closest_match['filename']
@@ -158,16 +274,62 @@ def match_mp3_to_track_locations(mp3_files, track_locations, djId_to_songID, unm
             else:
                 unmatched_songs.append({
                     "filename": mp3.name,
-                    "fullpath": str(mp3.resolve()),
+                    "fullpath": mp3_path,
                     "normalized_mp3_subpath": normalized_mp3_subpath
                 })
                 total_unmatched += 1
 
         if total_processed % 50 == 0:
-            logging.info(f"Processed {total_processed} files. Matched: {total_matched}, Unmatched: {total_unmatched}")
+            logging.info("Processed %d files. Matched: %d, Unmatched: %d", total_processed, total_matched, total_unmatched)
 
     return matched_tracks
 
+# Linux FICLONE ioctl request number, _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+@lru_cache(maxsize=None)
+def _darwin_clonefile():
+    """Return libc clonefile(2) on macOS, or None when it is unavailable."""
+    if sys.platform != "darwin":
+        return None
+    try:
+        clonefile = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True).clonefile
+    except (OSError, AttributeError):
+        return None
+    clonefile.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32]
+    clonefile.restype = ctypes.c_int
+    return clonefile
+
+def clone_or_copy(src, dst, link_mode="reflink"):
+    """
+    Copy src to dst, as a copy-on-write clone when link_mode is "reflink" and the
+    filesystem supports it (APFS clonefile, Btrfs/XFS FICLONE). Falls back to
+    shutil.copyfile across volumes or on filesystems without clones.
+    Hard links are not offered: the ID3 update afterwards would rewrite the source MP3.
+    The data goes to a temp file beside dst that is renamed into place once complete,
+    so an interrupted run never leaves a truncated dst behind.
+    """
+    tmp = f"{dst}.tmp"
+    # clonefile() refuses to replace an existing file, so clear any leftover temp first
+    if os.path.lexists(tmp):
+        os.unlink(tmp)
+    cloned = False
+    if link_mode == "reflink":
+        clonefile = _darwin_clonefile()
+        try:
+            if clonefile is not None:
+                cloned = clonefile(os.fsencode(src), os.fsencode(tmp), 0) == 0
+            elif sys.platform.startswith("linux"):
+                import fcntl
+                with open(src, "rb") as s, open(tmp, "wb") as d:
+                    fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+                cloned = True
+        except OSError:
+            pass
+    if not cloned:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
 def copy_and_rename_mp3_flat(mp3, song_id, target_folder):
     """Copy MP3 files to a flat folder in the target directory, renaming by song_id."""
     new_file_path = target_folder / f"{song_id}.mp3"
@@ -175,18 +337,12 @@ def copy_and_rename_mp3_flat(mp3, song_id, target_folder):
     return new_file_path
 
 
-def get_tango_song_metadata(song_id, tango_songs):
-    """Retrieve metadata from djTangoSongs.json based on songID."""
-    for song in tango_songs:
-        if song["songID"] == song_id:
-            return song
-    return None
-
-
 def copy_and_rename_mp3_flat(mp3, song_id, target_folder, song_metadata):
     """Copy MP3 files to a flat folder in the target directory, renaming by song_id and updating metadata."""
     new_file_path = target_folder / f"{song_id}.mp3"
-    shutil.copy(mp3, new_file_path)
+    # Re-runs: keep an existing copy that is at least as new as the source
+    if not (new_file_path.exists() and new_file_path.stat().st_mtime >= mp3.stat().st_mtime):
+        clone_or_copy(mp3, new_file_path, LINK_MODE)
 
     # Update the metadata for the copied file
     update_mp3_metadata(new_file_path, song_metadata)
@@ -212,18 +368,22 @@ if __name__ == "__main__":
     # Create a map from djId to songID
     djId_to_songID = {str(song["djId"]): song["songID"] for song in tango_songs}
 
+    # Create a map from songID to its djTangoSongs.json metadata
+    songID_to_song = {song["songID"]: song for song in tango_songs}
+
     unmatched_songs = []
     matched_tracks = match_mp3_to_track_locations(mp3_files, track_locations, djId_to_songID, unmatched_songs)
 
     # Process matched tracks
    # Process matched tracks
     all_songs_metadata = []
+    copy_jobs = []
     for match in matched_tracks:
         song_id = match["songID"]
-        mp3 = Path(match["filepath"])
+        mp3 = match["mp3"]
 
         # Look up metadata from djTangoSongs.json by songID
-        tango_metadata = get_tango_song_metadata(song_id, tango_songs)
+        tango_metadata = songID_to_song.get(song_id)
         if not tango_metadata:
             unmatched_songs.append({"filename": match["filename"], "fullpath": match["filepath"]})
             continue
@@ -245,16 +405,33 @@ if __name__ == "__main__":
             "Singer": ""
         }
 
-        # Copy and rename MP3 into a flat folder and update metadata
-        copy_and_rename_mp3_flat(mp3, song_id, TARGET_FOLDER, song_metadata)
-
-        # Append song metadata
-        all_songs_metadata.append(song_metadata)
+        # Queue the MP3 copy; copies run concurrently after metadata is built
+        copy_jobs.append((match, mp3, song_id, song_metadata))
+
+    # Copy and rename MP3s into a flat folder and update metadata (I/O bound)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [
+            executor.submit(copy_and_rename_mp3_flat, mp3, song_id, TARGET_FOLDER, song_metadata)
+            for _, mp3, song_id, song_metadata in copy_jobs
+        ]
+        for (match, _, _, song_metadata), future in zip(copy_jobs, futures):
+            try:
+                future.result()
+            except Exception as e:
+                # One failed copy or tag write must not cost the outputs of the whole run
+                logging.error(f"Failed to copy {match['filepath']}: {e}")
+                unmatched_songs.append({
+                    "filename": match["filename"],
+                    "fullpath": match["filepath"],
+                    "reason": f"copy_error: {e}"
+                })
+                continue
+            # Append song metadata
+            all_songs_metadata.append(song_metadata)
 
     # Save outputs
     save_json({"songs": all_songs_metadata}, SONGS_JSON_FILE)
-    matched_filenames = [{"filename": t["filename"]} for t in matched_tracks]
-    save_json(matched_filenames, MATCHED_OUTPUT_FILE)
-    save_json(unmatched_songs, UNMATCHED_OUTPUT_FILE)
+    save_json_lines(({"filename": t["filename"]} for t in matched_tracks), MATCHED_OUTPUT_FILE)
+    save_json_lines(unmatched_songs, UNMATCHED_OUTPUT_FILE)
 
     logging.info("Processing complete.")
\ No newline at end of file
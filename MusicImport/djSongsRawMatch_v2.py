@@ -18,17 +18,26 @@ import argparse
 import logging
 from pathlib import Path
 import unicodedata
+from functools import lru_cache
 import shutil
+import sys
+import ctypes
+import ctypes.util
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Try to import mutagen for ID3 tagging (optional in dry-run)
 try:
-    from mutagen.id3 import ID3, TIT2, TALB, TPE1, TCON, COMM, error as ID3Error
-    from mutagen.mp3 import MP3
+    from mutagen.id3 import ID3, ID3NoHeaderError, TIT2, TALB, TPE1, TCON, COMM
     MUTAGEN_AVAILABLE = True
 except ImportError:
     MUTAGEN_AVAILABLE = False
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
@@ -62,6 +71,9 @@ AZURE_BLOB_BASE = "https://namethattangotune.blob.core.windows.net"
 
 LOG_FILE = "djMatch_v2.log"
 
+# Concurrent file copies; the copy phase is disk-bound
+COPY_WORKERS = 8
+
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Match MP3 files to tango songs')
@@ -73,6 +85,9 @@ def parse_args():
                         help='Process only N songs (0 = all)')
     parser.add_argument('--skip-copy', action='store_true',
                         help='Skip file copy, just generate metadata')
+    parser.add_argument('--link-mode', choices=['reflink', 'copy'], default='reflink',
+                        help='reflink: copy-on-write clone when the volume supports it, '
+                             'else copy (default); copy: always copy bytes')
     parser.add_argument('--local-url', action='store_true',
                         help='Use local file:// URLs instead of Azure blob URLs')
     parser.add_argument('--verbose', '-v', action='store_true',
@@ -96,37 +111,71 @@ def setup_logging(verbose=False):
 # UTILITY FUNCTIONS
 # =============================================================================
 
+class _MarkTable(dict):
+    """str.translate table that deletes nonspacing marks (category Mn), filled lazily per codepoint."""
+
+    def __missing__(self, codepoint):
+        value = None if unicodedata.category(chr(codepoint)) == 'Mn' else codepoint
+        self[codepoint] = value
+        return value
+
+
+_MARK_TABLE = _MarkTable()
+
+
+@lru_cache(maxsize=100_000)
 def normalize_filename(name):
     """Normalize filename by removing diacritics."""
     if not name:
         return ""
-    return ''.join(c for c in unicodedata.normalize('NFD', name)
-                   if unicodedata.category(c) != 'Mn')
+    if name.isascii():
+        return name
+    return unicodedata.normalize('NFD', name).translate(_MARK_TABLE)
 
 
 def load_json(file_path):
     """Load JSON from file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    # One read of the whole file, parsed straight from bytes (no text-mode decode/buffering layer)
+    raw = Path(file_path).read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
 
 
-def save_json(data, file_path, dry_run=False):
-    """Save JSON to file."""
+def save_json(data, file_path, dry_run=False, pretty=False):
+    """Save JSON to file; compact unless pretty (indent=2) is requested."""
     if dry_run:
         logging.info(f"[DRY RUN] Would save {len(data) if isinstance(data, list) else 'dict'} to {file_path}")
         return
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        Path(file_path).write_bytes(orjson.dumps(data, option=option))
+    else:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            if pretty:
+                f.write(json.dumps(data, ensure_ascii=False, indent=2))
+            else:
+                f.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')))
     logging.info(f"Saved to {file_path}")
 
 
 def find_mp3_files(folder):
-    """Recursively find all MP3 files."""
+    """Recursively find all MP3 files, as path strings, walking with os.scandir."""
     folder = Path(folder)
     if not folder.exists():
         logging.error(f"Source folder not found: {folder}")
         return []
-    return list(folder.rglob("*.mp3"))
+    # scandir's DirEntry carries the file type from the directory read, so no stat() per entry
+    mp3_files = []
+    stack = [str(folder)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".mp3"):
+                    mp3_files.append(entry.path)
+    return mp3_files
 
 
 def get_subpath_after_marker(path_str, markers=['mixxx/', 'music/']):
@@ -146,7 +195,7 @@ def get_subpath_after_marker(path_str, markers=['mixxx/', 'music/']):
 def update_mp3_metadata(mp3_file, song_metadata, dry_run=False):
     """Update MP3 ID3 tags."""
     if dry_run:
-        logging.debug(f"[DRY RUN] Would update metadata for {mp3_file}")
+        logging.debug("[DRY RUN] Would update metadata for %s", mp3_file)
         return True
 
     if not MUTAGEN_AVAILABLE:
@@ -154,45 +203,110 @@ def update_mp3_metadata(mp3_file, song_metadata, dry_run=False):
         return False
 
     try:
-        audio = MP3(mp3_file, ID3=ID3)
+        # Only the ID3 tag is read; the MPEG audio frames are never parsed
         try:
-            audio.add_tags()
-        except ID3Error:
-            pass
-
-        audio.tags["TIT2"] = TIT2(encoding=3, text=song_metadata.get('Title', ''))
-        audio.tags["TALB"] = TALB(encoding=3, text=song_metadata.get('Album', ''))
-        audio.tags["TPE1"] = TPE1(encoding=3, text=song_metadata.get('ArtistMaster', ''))
-        audio.tags["TCON"] = TCON(encoding=3, text=song_metadata.get('Style', ''))
-        audio.tags["COMM"] = COMM(encoding=3, lang="eng", desc="SongID",
-                                   text=f"SongID: {song_metadata.get('SongID', '')}")
-        audio.save()
+            tags = ID3(mp3_file)
+        except ID3NoHeaderError:
+            tags = ID3()
+
+        tags["TIT2"] = TIT2(encoding=3, text=song_metadata.get('Title', ''))
+        tags["TALB"] = TALB(encoding=3, text=song_metadata.get('Album', ''))
+        tags["TPE1"] = TPE1(encoding=3, text=song_metadata.get('ArtistMaster', ''))
+        tags["TCON"] = TCON(encoding=3, text=song_metadata.get('Style', ''))
+        tags["COMM"] = COMM(encoding=3, lang="eng", desc="SongID",
+                            text=f"SongID: {song_metadata.get('SongID', '')}")
+        # Keep at least 1 KiB of padding so later tag edits fit in place without rewriting the audio
+        tags.save(mp3_file, padding=lambda info: max(1024, info.padding))
         return True
     except Exception as e:
         logging.error(f"Failed to update metadata for {mp3_file}: {e}")
         return False
 
 
+# Linux FICLONE ioctl request number, _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+@lru_cache(maxsize=None)
+def _darwin_clonefile():
+    """Return libc clonefile(2) on macOS, or None when it is unavailable."""
+    if sys.platform != "darwin":
+        return None
+    try:
+        clonefile = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True).clonefile
+    except (OSError, AttributeError):
+        return None
+    clonefile.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32]
+    clonefile.restype = ctypes.c_int
+    return clonefile
+
+
+def clone_or_copy(src, dst, link_mode="reflink"):
+    """
+    Copy src to dst, as a copy-on-write clone when link_mode is "reflink" and the
+    filesystem supports it (APFS clonefile, Btrfs/XFS FICLONE). Falls back to
+    shutil.copyfile across volumes or on filesystems without clones.
+    Hard links are not offered: the ID3 update afterwards would rewrite the source MP3.
+    The data goes to a temp file beside dst that is renamed into place once complete,
+    so an interrupted run never leaves a truncated dst behind.
+    """
+    tmp = f"{dst}.tmp"
+    # clonefile() refuses to replace an existing file, so clear any leftover temp first
+    if os.path.lexists(tmp):
+        os.unlink(tmp)
+    cloned = False
+    if link_mode == "reflink":
+        clonefile = _darwin_clonefile()
+        try:
+            if clonefile is not None:
+                cloned = clonefile(os.fsencode(src), os.fsencode(tmp), 0) == 0
+            elif sys.platform.startswith("linux"):
+                import fcntl
+                with open(src, "rb") as s, open(tmp, "wb") as d:
+                    fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+                cloned = True
+        except OSError:
+            pass
+    if not cloned:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def copy_song_file(mp3_file, target_path, song_metadata, link_mode="reflink"):
+    """Copy an MP3 to its songID filename and update its ID3 tags."""
+    clone_or_copy(mp3_file, target_path, link_mode)
+    update_mp3_metadata(target_path, song_metadata)
+
+
 # =============================================================================
 # FILE MATCHING
 # =============================================================================
 
 def build_file_index(mp3_files):
-    """Build index of MP3 files by normalized path."""
+    """
+    Build index of MP3 files by normalized path.
+
+    Returns:
+        tuple: (index by normalized subpath, index by normalized filename)
+    """
     index = {}
     for mp3 in mp3_files:
-        subpath = get_subpath_after_marker(str(mp3.resolve()))
+        subpath = get_subpath_after_marker(mp3)
         normalized = normalize_filename(subpath).lower()
         index[normalized] = mp3
-    return index
+    # First file per filename, in index order; duplicate names collapse to one entry
+    name_index = {}
+    for key, mp3 in index.items():
+        name_index.setdefault(key.rpartition('/')[2], mp3)
+    return index, name_index
 
 
-def match_song_to_file(song, file_index):
+def match_song_to_file(song, file_index, name_index):
     """
     Try to match a song record to an MP3 file.
 
     Returns:
-        Path or None
+        str path or None
     """
     file_path = song.get('filePath', '')
     if not file_path:
@@ -205,10 +319,13 @@ def match_song_to_file(song, file_index):
     if normalized in file_index:
         return file_index[normalized]
 
-    # Try filename-only match
+    # Try filename-only match: exact filename first, then any path ending with it
     filename = Path(file_path).name
     normalized_name = normalize_filename(filename).lower()
 
+    if normalized_name in name_index:
+        return name_index[normalized_name]
+
     for key, mp3 in file_index.items():
         if key.endswith(normalized_name):
             return mp3
@@ -253,7 +370,8 @@ def process_songs(source_config, args):
         logging.info(f"Processing sample of {len(tango_songs)} songs")
 
     # Find MP3 files
-    source_folder = Path(source_config['source_folder'])
+    # Resolved once here so the scanned file paths are canonical without a per-file resolve()
+    source_folder = Path(source_config['source_folder']).resolve()
     if not source_folder.exists():
         logging.error(f"Source folder not found: {source_folder}")
         logging.error("Is the external drive mounted?")
@@ -265,7 +383,7 @@ def process_songs(source_config, args):
 
     # Build file index
     logging.info("Building file index...")
-    file_index = build_file_index(mp3_files)
+    file_index, name_index = build_file_index(mp3_files)
 
     # Ensure target folder exists
     target_folder = Path(source_config['target_folder'])
@@ -275,6 +393,7 @@ def process_songs(source_config, args):
 
     # Process songs
     all_songs_metadata = []
+    copy_jobs = []
     matched = []
     unmatched = []
     stats = {
@@ -287,10 +406,10 @@ def process_songs(source_config, args):
 
     for i, song in enumerate(tango_songs):
         if (i + 1) % 500 == 0:
-            logging.info(f"Progress: {i+1}/{len(tango_songs)}")
+            logging.info("Progress: %d/%d", i + 1, len(tango_songs))
 
         song_id = song['songID']
-        mp3_file = match_song_to_file(song, file_index)
+        mp3_file = match_song_to_file(song, file_index, name_index)
 
         if not mp3_file:
             unmatched.append({
@@ -343,24 +462,35 @@ def process_songs(source_config, args):
             "priorityScore": song.get('priorityScore', 0)
         }
 
-        # Copy file (unless dry-run or skip-copy)
+        # Queue the copy (unless dry-run or skip-copy); copies run concurrently below
         if not args.dry_run and not args.skip_copy:
-            target_path = target_folder / f"{song_id}.mp3"
-            try:
-                shutil.copy2(mp3_file, target_path)
-                update_mp3_metadata(target_path, song_metadata)
-                stats['copied'] += 1
-            except Exception as e:
-                logging.error(f"Failed to copy {mp3_file}: {e}")
-                unmatched.append({
-                    'songID': song_id,
-                    'sourceFile': str(mp3_file),
-                    'reason': f'copy_error: {e}'
-                })
-                continue
+            copy_jobs.append((mp3_file, target_folder / f"{song_id}.mp3", song_metadata))
+            continue
 
         all_songs_metadata.append(song_metadata)
 
+    # Copy files and update tags (I/O bound, so threads overlap the disk work)
+    if copy_jobs:
+        logging.info(f"Copying {len(copy_jobs):,} files...")
+        with ThreadPoolExecutor(max_workers=COPY_WORKERS) as executor:
+            futures = [
+                executor.submit(copy_song_file, mp3_file, target_path, song_metadata, args.link_mode)
+                for mp3_file, target_path, song_metadata in copy_jobs
+            ]
+            for (mp3_file, _, song_metadata), future in zip(copy_jobs, futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Failed to copy {mp3_file}: {e}")
+                    unmatched.append({
+                        'songID': song_metadata['SongID'],
+                        'sourceFile': str(mp3_file),
+                        'reason': f'copy_error: {e}'
+                    })
+                    continue
+                stats['copied'] += 1
+                all_songs_metadata.append(song_metadata)
+
     return all_songs_metadata, matched, unmatched, stats
 
 
@@ -408,7 +538,7 @@ def main():
     print(f"{'='*60}")
 
     # Main songs file
-    save_json({"songs": all_songs}, source_config['output_file'], args.dry_run)
+    save_json({"songs": all_songs}, source_config['output_file'], args.dry_run, pretty=True)
 
     # Matched list
     save_json(matched, source_config['matched_file'], args.dry_run)
@@ -199,7 +199,7 @@ def save_json(data, output_path, dry_run=False):
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        f.write(json.dumps(data, ensure_ascii=False, indent=2, default=str))
 
     file_size = output_path.stat().st_size
     print(f"\n✓ Saved {len(data):,} records to: {output_path}")
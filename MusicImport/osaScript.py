@@ -18,8 +18,6 @@ tell application "Finder"
 end tell
 '''
 
-subprocess.run(["osascript", "-e", script], check=True)
-
 """
 script = f'''
 tell application "Music"
@@ -32,7 +30,8 @@ end tell
 
 try:
     logging.info(f"Executing AppleScript to play {file_path}")
-    subprocess.run(["osascript", "-e", script], check=True)
+    # Script is fed on stdin ("-"); stderr is captured for the error log below
+    subprocess.run(["osascript", "-"], input=script.encode('utf-8'), capture_output=True, check=True)
     logging.info("Playback started successfully.")
 except subprocess.CalledProcessError as e:
     logging.error(f"Error playing the file: {e.stderr.decode('utf-8') if e.stderr else 'No error message available.'}")
\ No newline at end of file
@@ -365,7 +365,7 @@ def generate_fix_report(source_config):
     # Write report
     report_file = f'./fix_report_{source_config["description"].lower()}.json'
     with open(report_file, 'w', encoding='utf-8') as f:
-        json.dump(fixes_needed, f, ensure_ascii=False, indent=2)
+        f.write(json.dumps(fixes_needed, ensure_ascii=False, indent=2))
 
     print(f"\nFixes needed:")
     print(f"  Add to ArtistMaster: {len(fixes_needed['add_to_artist_master'])} artists")